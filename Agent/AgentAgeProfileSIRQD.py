@@ -1,16 +1,17 @@
 '''
 Many diseases affect people in older age groups more than younger age groups.
 This simulation implements this possibility inside a regular agent based SIRQD model.
-A population is created with two age profiles. Agents can be either old or young.
-The agents in the old population have a higher death rate.
+A population is created with a number of age groups, by default two, young and old.
+Each age group can have its own death rate, with the old having a higher one, and optionally a contact matrix
+sets how likely the agents in each age group are to infect those in each other age group.
+More age groups can be added by giving more sizes and death rates.
+It can be run with or without animation by setting the ANIMATION_FLAG to true or false.
+The simulation itself runs without pygame, and if animated, snapshots of it are played back once it has finished.
 The results are immediately plotted and save to the Plots folder.
 '''
 import numpy as np
-import pygame
-import sys
-from pygame.locals import *
 import matplotlib.pyplot as plt
-import agents
+import population as pop
 
 ANIMATION_FLAG = True  # Change this depending on if you want an animation or not.
 
@@ -24,78 +25,47 @@ T = 2000 # The length of time the simulation will run for. 2000 works well.
 # The disease parameters
 beta = 0.05 # The infection rate
 gamma = 0.015 # The rate of recovery
-old_mu = 0.04 # The death rate for old people
-young_mu = 0.015 # The death rate for young people
 kappa = 0.5 # The quarantine rate
 
-N_old = 30 # The number of old people
-N_young = 70 # The number of young people
+ages = ['Young', 'Old'] # The names of the age groups
+sizes = [70, 30] # The number of people in each age group
+mu = [0.015, 0.04] # The death rate for each age group
+contact_matrix = None # eg. [[1, 0.5], [0.5, 1]] for each age group to infect the other half as much as their own
 init_I = 5 # The number of Infectious agents at beginning of simulation
 
+seed = None # Set to an integer to get the same simulation every time
+frame_every = 1 # Only every frame_every-th time step is drawn in the animation
+
 # --------------------------------------------------------------------------------
 
-WHITE = (255, 255, 255)
 if ANIMATION_FLAG: # Some set up for animation
-	screen = pygame.display.set_mode((width,height))
-	screen.fill(WHITE)
-	clock = pygame.time.Clock()
-
-# This set ups the simulation using a function defined in agents.py
-population = agents.create_SIRQD_population_with_age_profile(N_old, N_young, init_I, radius, beta, gamma, old_mu, young_mu, kappa, width, height)
-
-# Arrays to store the number of agents in each category at each time step
-Sarray = np.zeros(T)
-Iarray = np.zeros(T)
-Rarray = np.zeros(T)
-Darray = np.zeros(T)
-Qarray = np.zeros(T)
-old_Darray = np.zeros(T)
-
-# The simulation loop
-for i in range(T):
-
-	# The actual running of the simulation.
-	# This relies on the agent's methods defined in agents.py
-	for person in population:
-		for otherperson in population:
-			if person==otherperson:
-				continue
-			person.infect(otherperson)
-		
-		# Each agent's status is only updated every 10th timestep.
-		# This stops them from turning from I to D or I to R etc. too quickly.
-		# And it keeps gamma and mu values on more realistic scale.
-		if i % 10 == 0:
-			person.status_update()
-		
-		person.position_update()
-
-		if ANIMATION_FLAG:
-			person.draw(screen)
-
-		if person.status == 'S':
-			Sarray[i] += 1
-		elif person.status == 'I':
-			Iarray[i] += 1
-		elif person.status == 'R':
-			Rarray[i] += 1
-		elif person.status == 'D':
-			Darray[i] += 1
-			if person.mu == old_mu:
-				old_Darray[i] += 1
-		else:
-			Qarray[i] += 1
-	
-
-	# Things to take care of for animation
+	import rendering
+	snapshots = rendering.SnapshotBuffer(every=frame_every)
+
+# This set ups the simulation using a function defined in population.py
+# Each age group is a group of the population, so that it is counted separately
+population = pop.create_grouped_population(sizes, init_I, radius, beta, gamma, width, height, mu=mu, kappa=kappa,
+											contact_matrix=contact_matrix, seed=seed)
+
+# Runs the simulation, recording the number of agents in each category at each time step.
+# This relies on the Population class defined in population.py
+# Each agent's status is only updated every 10th timestep.
+# This stops them from turning from I to D or I to R etc. too quickly.
+# And it keeps gamma and mu values on more realistic scale.
+# Without an animation to show, the simulation stops once nobody's status can change any more,
+# and the rest of the counts are filled in, see simulate in population.py.
+def record(population):
 	if ANIMATION_FLAG:
-		clock.tick(60)
-		pygame.display.update()
-		screen.fill(WHITE)
+		snapshots.record(population)
+	return np.append(population.counts(), population.group_counts[:, pop.D])
+
+counts = pop.simulate(population, T, record, stop_early=not ANIMATION_FLAG)
+Sarray, Iarray, Rarray, Darray, Qarray = counts[:, [pop.S, pop.I, pop.R, pop.D, pop.Q]].T
+age_Darray = counts[:, len(pop.STATUSES):] # The deaths in each age group
 
-		for event in pygame.event.get():
-			if event.type == pygame.QUIT:
-				sys.exit()
+# Play back the animation
+if ANIMATION_FLAG:
+	rendering.Viewer(width, height, radius).play(snapshots)
 
 # We plot the results of the simulation
 plt.plot(Sarray, label='Susceptible', color=(0,0,1))
@@ -104,9 +74,10 @@ plt.plot(Rarray, label='Recovered', color=(1,0,0))
 plt.plot(Darray, label='Dead', color=(0.3,0.3,0.3))
 plt.plot(Qarray, label='Quarantined', color=(0.5,0,0.5))
 
-old_deaths_percent = round(100*old_Darray[-1]/Darray[-1],2)
-plt.plot([], label=f'Old % deaths: {old_deaths_percent}', color=(1,1,1))
-plt.plot([], label=f'Old % of population: {round((100*N_old)/(N_old+N_young),2)}', color=(1,1,1))
+for age, deaths, size in zip(ages, age_Darray[-1], sizes):
+	deaths_percent = round(100*deaths/max(Darray[-1], 1),2)
+	plt.plot([], label=f'{age} % deaths: {deaths_percent}', color=(1,1,1))
+	plt.plot([], label=f'{age} % of population: {round((100*size)/sum(sizes),2)}', color=(1,1,1))
 
 plt.xlabel("Time")
 plt.ylabel("Number of people")
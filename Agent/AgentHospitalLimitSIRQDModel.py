@@ -2,19 +2,21 @@
 The death rate from a disease is not always constant.
 If the number of people in hospital saturates the availability of hospital beds,
 then it is expected that the death rate would increase.
-This simulation implements this scenario, inside of a SIRQD simulation.
-The parameter hospital_limit controls when the hospital system is saturated.
-The parameter hospital_factor controls by what factor the death rate increase when the hospital system is saturated.
+This simulation implements this scenario, inside of a SIRQD simulation, using the hospitals in hospital.py.
+The parameter hospital_limit is the number of hospital beds, which the Infectious and Quarantined agents are given
+in the order they fell ill. Once they are all full the rest wait for one, and their death rate is multiplied by hospital_factor.
+The death rate of those in a bed also goes up as the beds fill up, by strain.
+Setting LIMIT_ONLY to True gives the original rule instead, where the death rate of everyone is multiplied by
+hospital_factor whenever there are more than hospital_limit Infectious agents.
 It can be run with or without animation by changing the ANIMATION_FLAG constant to True or False.
+The simulation itself runs without pygame, and if animated, snapshots of it are played back once it has finished.
 When the hospital limit is reached the animation will display the text "Hospital Limit Reached".
 The results are immediatly plotted and the plot saved in the Plots folder.
 '''
 import numpy as np
-import pygame
-import sys
-from pygame.locals import *
 import matplotlib.pyplot as plt
-import agents
+import population as pop
+from hospital import Hospital, HospitalLimit
 
 ANIMATION_FLAG = True  # Change this depending on if you want an animation or not.
 
@@ -34,81 +36,60 @@ kappa = 0.2 # The quarantine rate
 N = 100 # The total number of agents
 init_I = 5 # The number of Infectious agents at beginning of simulation
 
-hospital_limit = 15 # The number of infectious people there can be before hospital is overwhelmed
-hospital_factor = 2 # The factor that the death rate is increased by when hospital limit is reached
+hospital_limit = 15 # The number of hospital beds
+hospital_factor = 2 # The factor that the death rate is increased by for those waiting for a bed
+strain = 0.5 # When all the beds are full, the death rate of those in a bed is 1 + strain times higher
+LIMIT_ONLY = False # Use the original rule, where everyone's death rate goes up when there are more than hospital_limit Infectious agents
+
+seed = None # Set to an integer to get the same simulation every time
+frame_every = 1 # Only every frame_every-th time step is drawn in the animation
 #-------------------------------------------------------------------------------------------
 
-WHITE = (255, 255, 255)
 if ANIMATION_FLAG: # Some set up for animation
-	screen = pygame.display.set_mode((width,height))
-	screen.fill(WHITE)
-	clock = pygame.time.Clock()
+	import pygame
+	import rendering
+	snapshots = rendering.SnapshotBuffer(every=frame_every)
 	pygame.font.init()
 	myfont = pygame.font.Font(None, 20)
 	text = myfont.render('Hospital Limit Reached', False, (0,0,0))	
 
+	def hospital_text(screen, snapshot):
+
+		# The snapshot is taken at the end of time step i
+		i = snapshot.tick - 1
+		if i > 0 and Overwhelmed[i-1]:
+			screen.blit(text, (10,10))
+
+
+# This set ups the simulation using a function defined in population.py
+if LIMIT_ONLY:
+	hospital = HospitalLimit(hospital_limit, hospital_factor)
+else:
+	hospital = Hospital(hospital_limit, hospital_factor, strain)
 
-# This set ups the simulation using a function defined in agents.py
-population = agents.create_SIRQD_population_with_hospital_limit(N, init_I, radius, beta, gamma, mu, kappa, width, height, hospital_factor)
-
-
-# Arrays to store the number of agents in each category at each time step
-Sarray = np.zeros(T)
-Iarray = np.zeros(T)
-Rarray = np.zeros(T)
-Darray = np.zeros(T)
-Qarray = np.zeros(T)
-
-# The simulation loop
-for i in range(T):
-
-	# The actual running of the simulation.
-	# This relies on the agent's methods defined in agents.py
-	for person in population:
-		for otherperson in population:
-			if person==otherperson:
-				continue
-			person.infect(otherperson)
-		
-		# Each agent's status is only updated every 10th timestep.
-		# This stops them from turning from I to D or I to R etc. too quickly.
-		# And it keeps gamma and mu values on more realistic scale.
-		if i % 10 == 0:
-			if i == 0:
-				person.status_update()
-			if i>0 and Iarray[i-1] > hospital_limit:
-				person.hospital_status_update()
-			else:
-				person.status_update()
-		
-		person.position_update()
-
-		if ANIMATION_FLAG:
-			person.draw(screen)	
-			if i> 0 and Iarray[i-1] > hospital_limit:
-				screen.blit(text, (10,10))
-
-		if person.status == 'S':
-			Sarray[i] += 1
-		elif person.status == 'I':
-			Iarray[i] += 1
-		elif person.status == 'R':
-			Rarray[i] += 1
-		elif person.status == 'D':
-			Darray[i] += 1
-		else:
-			Qarray[i] += 1
-	
-
-	# Things to take care of for animation
+population = pop.create_population(N, init_I, radius, beta, gamma, width, height, mu=mu, kappa=kappa, hospital=hospital, seed=seed)
+
+
+# Runs the simulation, recording the number of agents in each category at each time step.
+# This relies on the Population class defined in population.py
+# Each agent's status is only updated every 10th timestep.
+# This stops them from turning from I to D or I to R etc. too quickly.
+# And it keeps gamma and mu values on more realistic scale.
+# The death rates are worked out by the hospital from the number of patients at the end of the last timestep.
+# Without an animation to show, the simulation stops once nobody's status can change any more,
+# and the rest of the counts are filled in, see simulate in population.py.
+def record(population):
 	if ANIMATION_FLAG:
-		clock.tick(60)
-		pygame.display.update()
-		screen.fill(WHITE)
+		snapshots.record(population)
+	return np.append(population.counts(), population.hospital.overwhelmed(population.counts()))
+
+counts = pop.simulate(population, T, record, stop_early=not ANIMATION_FLAG)
+Sarray, Iarray, Rarray, Darray, Qarray = counts[:, [pop.S, pop.I, pop.R, pop.D, pop.Q]].T
+Overwhelmed = counts[:, -1].astype(bool) # Whether there were more patients than the hospitals could take
 
-		for event in pygame.event.get():
-			if event.type == pygame.QUIT:
-				sys.exit()
+# Play back the animation
+if ANIMATION_FLAG:
+	rendering.Viewer(width, height, radius, extras=hospital_text).play(snapshots)
 
 # We plot the results of the simulation
 plt.plot(Sarray, label='Susceptible', color=(0,0,1))
@@ -118,7 +99,7 @@ plt.plot(Darray, label='Dead', color=(0.3,0.3,0.3))
 plt.plot(Qarray, label='Quarantined', color=(0.5,0,0.5))
 
 for i in range(T-1):
-	if Iarray[i] > hospital_limit:
+	if Overwhelmed[i]:
 		plt.fill_betweenx(y=[0,N], x1=[i,i], x2=[i+0.9,i+0.9], color=(0.3,0.3,0.3), alpha=0.05)
 plt.plot([], label='Hospital Limit Exceeded', color=(0.3,0.3,0.3), alpha=0.2)
 
@@ -4,14 +4,11 @@ This is analagous to the SIR equation based model.
 Agents have three possible statuses; Susceptible, Infectious or Recovered.
 Susceptible agents are coloured blue, Infectious coloured green and Recovered coloured red.
 It can be run with or without animation by setting the ANIMATION_FLAG to true or false.
+The simulation itself runs without pygame, and if animated, snapshots of it are played back once it has finished.
 The data from the simulation is not stored but is immediately plotted and the plot saved to the Plots folder.
 '''
-import numpy as np
-import pygame
-import sys
-from pygame.locals import *
 import matplotlib.pyplot as plt
-import agents
+import population as pop
 
 ANIMATION_FLAG = True  # Change this depending on if you want an animation or not.
 
@@ -28,56 +25,33 @@ beta = 0.05 # The infection rate
 N = 100 # The total number of agents
 init_I = 5 # The number of Infectious agents at beginning of simulation
 
+seed = None # Set to an integer to get the same simulation every time
+frame_every = 1 # Only every frame_every-th time step is drawn in the animation
+
 #------------------------------------------------------------------------------------
 
-WHITE = (255, 255, 255)
 if ANIMATION_FLAG: # Some set up for animation
-	screen = pygame.display.set_mode((width,height))
-	screen.fill(WHITE)
-	clock = pygame.time.Clock()
-
-# This set ups the simulation using a function defined in agents.py
-population = agents.create_SIR_population(N, init_I, radius, beta, gamma, width, height)
-
-# Arrays to store the number of agents in each category at each time step
-Sarray = np.zeros(T)
-Iarray = np.zeros(T)
-Rarray = np.zeros(T)
-
-# The simulation loop
-for i in range(T):
-
-	# The actual running of the simulation.
-	# This relies on the agent's methods defined in agents.py
-	for person in population:
-		for otherperson in population:
-			if person==otherperson:
-				continue
-			person.infect(otherperson)
-		if i % 10 == 0:
-			person.status_update()
-		
-		person.position_update()
-
-		if ANIMATION_FLAG:
-			person.draw(screen)
-
-		if person.status == 'S':
-			Sarray[i] += 1
-		elif person.status == 'I':
-			Iarray[i] += 1
-		else:
-			Rarray[i] += 1
-
-	# Things to take care of for animation
+	import rendering
+	snapshots = rendering.SnapshotBuffer(every=frame_every)
+
+# This set ups the simulation using a function defined in population.py
+population = pop.create_population(N, init_I, radius, beta, gamma, width, height, seed=seed)
+
+# Runs the simulation, recording the number of agents in each category at each time step.
+# This relies on the Population class defined in population.py
+# Without an animation to show, the simulation stops once nobody's status can change any more,
+# and the rest of the counts are filled in, see simulate in population.py.
+def record(population):
 	if ANIMATION_FLAG:
-		clock.tick(60)
-		pygame.display.update()
-		screen.fill(WHITE)
+		snapshots.record(population)
+	return population.counts()
+
+counts = pop.simulate(population, T, record, stop_early=not ANIMATION_FLAG)
+Sarray, Iarray, Rarray = counts[:, [pop.S, pop.I, pop.R]].T
 
-		for event in pygame.event.get():
-			if event.type == pygame.QUIT:
-				sys.exit()
+# Play back the animation
+if ANIMATION_FLAG:
+	rendering.Viewer(width, height, radius).play(snapshots)
 
 # We plot the results of the simulation
 plt.plot(Sarray, label='Susceptible', color=(0,0,1))
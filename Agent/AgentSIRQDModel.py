@@ -1,6 +1,7 @@
 '''
 This is analagous to the SIRQD equation based model.
 It can be run with or without animation by changing the ANIMATION_FLAG constant to True or False.
+The simulation itself runs without pygame, and if animated, snapshots of it are played back once it has finished.
 Agents can have five possible health statuses; Susceptible, Infectious, Recovered, Quarantined, Dead.
 When Quarantined an agent will be coloured purple and will not move.
 From Quarantine it then becomes either Recovered or Dead and will change colour accordingly.
@@ -8,12 +9,8 @@ The percentage of agents that enter quarantine is controlled by the parameter ka
 As soon as an agent is infected, it has a probability of kappa of entering quarantine.
 The results are immediatly plotted and the plot saved in the Plots folder.
 '''
-import numpy as np
-import pygame
-import sys
-from pygame.locals import *
 import matplotlib.pyplot as plt
-import agents
+import population as pop
 
 ANIMATION_FLAG = True  # Change this depending on if you want an animation or not.
 
@@ -33,69 +30,38 @@ kappa = 0.5 # The quarantine rate
 N = 100 # The total number of agents
 init_I = 5 # The number of Infectious agents at beginning of simulation
 
+seed = None # Set to an integer to get the same simulation every time
+frame_every = 1 # Only every frame_every-th time step is drawn in the animation
+
 #--------------------------------------------------------------------------------------
 
-WHITE = (255, 255, 255)
 if ANIMATION_FLAG: # Some set up for animation
-	screen = pygame.display.set_mode((width,height))
-	screen.fill(WHITE)
-	clock = pygame.time.Clock()
-
-# This set ups the simulation using a function defined in agents.py
-population = agents.create_SIRQD_population(N, init_I, radius, beta, gamma, mu, kappa, width, height)
-
-
-
-# Arrays to store the number of agents in each category at each time step
-Sarray = np.zeros(T)
-Iarray = np.zeros(T)
-Rarray = np.zeros(T)
-Darray = np.zeros(T)
-Qarray = np.zeros(T)
-
-# The simulation loop
-for i in range(T):
-
-	# The actual running of the simulation.
-	# This relies on the agent's methods defined in agents.py
-	for person in population:
-		for otherperson in population:
-			if person==otherperson:
-				continue
-			person.infect(otherperson)
-		
-		# Each agent's status is only updated every 10th timestep.
-		# This stops them from turning from I to D or I to R etc. too quickly.
-		# And it keeps gamma and mu values on more realistic scale.
-		if i % 10 == 0:
-			person.status_update()
-		
-		person.position_update()
-
-		if ANIMATION_FLAG:
-			person.draw(screen)
-
-		if person.status == 'S':
-			Sarray[i] += 1
-		elif person.status == 'I':
-			Iarray[i] += 1
-		elif person.status == 'R':
-			Rarray[i] += 1
-		elif person.status == 'D':
-			Darray[i] += 1
-		else:
-			Qarray[i] += 1
-	
-
-	# Things to take care of for animation
+	import rendering
+	snapshots = rendering.SnapshotBuffer(every=frame_every)
+
+# This set ups the simulation using a function defined in population.py
+population = pop.create_population(N, init_I, radius, beta, gamma, width, height, mu=mu, kappa=kappa, seed=seed)
+
+
+
+# Runs the simulation, recording the number of agents in each category at each time step.
+# This relies on the Population class defined in population.py
+# Each agent's status is only updated every 10th timestep.
+# This stops them from turning from I to D or I to R etc. too quickly.
+# And it keeps gamma and mu values on more realistic scale.
+# Without an animation to show, the simulation stops once nobody's status can change any more,
+# and the rest of the counts are filled in, see simulate in population.py.
+def record(population):
 	if ANIMATION_FLAG:
-		clock.tick(60)
-		pygame.display.update()
-		screen.fill(WHITE)
+		snapshots.record(population)
+	return population.counts()
+
+counts = pop.simulate(population, T, record, stop_early=not ANIMATION_FLAG)
+Sarray, Iarray, Rarray, Darray, Qarray = counts[:, [pop.S, pop.I, pop.R, pop.D, pop.Q]].T
 
-		for event in pygame.event.get():
-			if event.type == pygame.QUIT:
-				sys.exit()
+# Play back the animation
+if ANIMATION_FLAG:
+	rendering.Viewer(width, height, radius).play(snapshots)
 
 # We plot the results of the simulation
 plt.plot(Sarray, label='Susceptible', color=(0,0,1))
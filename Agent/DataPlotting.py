@@ -1,22 +1,27 @@
 ''' 
 This is a simple script to take the data saved from repeated simulations and plot it.
+It can read both the binary files written by the repeated scripts, see trajectories.py, and the older csv files.
 '''
 
 import matplotlib.pyplot as plt 
-import pandas as pd
+import trajectories
 
-agentData = pd.read_csv("/Users/fionnbracken/Desktop/project-flbrack/Agent/Data/HomeAgentWOVerlap_50_Data.csv", delimiter=",")
+filename = "Data/HomeAgentWOverlap_50_Data.csv"
+T = 5000 # Only needed for the older csv files, which don't record how long each repeat was
 
-for k in range(10):
+colors = {'S': 'blue', 'I': 'green', 'R': 'red', 'D': 'grey', 'Q': 'purple', 'SuperSpreader': 'black'}
+labels = {'S': 'Susceptible', 'I': 'Infected', 'R': 'Recovered', 'D': 'Dead', 'Q': 'Quarantined', 'SuperSpreader': 'SuperSpreader'}
 
-    agentData['S'][5000*k:5000+5000*k].plot(color='blue', use_index=False, alpha=0.5)
-    agentData['I'][5000*k:5000+5000*k].plot(color='green', use_index=False, alpha=0.5)
-    agentData['R'][5000*k:5000+5000*k].plot(color='red', use_index=False, alpha=0.5)
-    agentData['SuperSpreader'][5000*k:5000+5000*k].plot(color='black', use_index=False, alpha=0.5)
+agentData, metadata = trajectories.load_trajectories(filename, T=T)
+columns = metadata['columns']
 
+for repeat in agentData:
+    for j, column in enumerate(columns):
+        plt.plot(repeat[:, j], color=colors[column], alpha=0.5)
 
-plt.legend(labels=['Susceptible', 'Infected', 'Recoverd', 'SuperSpreader'], loc=0)
+
+plt.legend(labels=[labels[column] for column in columns], loc=0)
 plt.xlabel('Time')
 plt.ylabel('People')
 plt.title('Multiple Agent Based Simulations')
-plt.savefig("./Plots/MultipleHomeAgentSimulsWOverlap_50.png")
\ No newline at end of file
+plt.savefig("./Plots/MultipleHomeAgentSimulsWOverlap_50.png")
@@ -0,0 +1,61 @@
+'''
+This compares how fast the vectorised Population engine in population.py runs,
+against the old loop over agent objects, which AgentSIRModel.py used before it moved to the Population, kept only for comparison.
+Both run the same SIR simulation without animation, and the number of time steps per second is printed.
+'''
+import time
+import agents
+import kernels
+import population
+
+#-------------------- Tunable Parameters -------------------------------------------
+
+width, height = 800, 600
+radius = 15.0
+
+T = 200 # The number of time steps each engine is timed over
+
+gamma = 0.015
+beta = 0.05
+
+sizes = [100, 1000] # The numbers of agents to compare at
+init_I = 5
+
+#------------------------------------------------------------------------------------
+
+def object_loop(N):
+
+	# The old simulation loop over agent objects, as AgentSIRModel.py used to run it, without the animation.
+	people = agents.create_SIR_population(N, init_I, radius, beta, gamma, width, height)
+
+	start = time.perf_counter()
+	for i in range(T):
+		grid = agents.SpatialHash(people)
+		for person in people:
+			for otherperson in grid.neighbours(person):
+				person.infect(otherperson)
+			if i % 10 == 0:
+				person.status_update()
+			person.position_update()
+
+	return time.perf_counter() - start
+
+
+def population_engine(N):
+
+	pop = population.create_population(N, init_I, radius, beta, gamma, width, height)
+
+	start = time.perf_counter()
+	population.simulate(pop, T, stop_early=False) # Timing every step, even once the epidemic has died out
+
+	return time.perf_counter() - start
+
+
+# Compile the kernels before anything is timed, if numba is installed, see kernels.py
+kernels.warm_up()
+
+print(f"{'N':>8} {'objects (ticks/s)':>20} {'population (ticks/s)':>22} {'speed up':>10}")
+for N in sizes:
+	objects = object_loop(N)
+	arrays = population_engine(N)
+	print(f"{N:>8} {T/objects:>20.1f} {T/arrays:>22.1f} {objects/arrays:>9.1f}x")
@@ -0,0 +1,44 @@
+'''
+This records an animation of one of the agent based models to a file, without needing a display,
+so that videos of outbreaks can be made on machines without a screen, eg. a compute server.
+The population can be one of the models in sweep.py, with any of its parameters changed from the defaults,
+or any other Population, eg. one with homes and super spreaders, or with age groups, see population.py.
+The animation can be saved as a folder of png images, a .gif, or a .mp4 if ffmpeg is installed.
+Only every frame_every-th time step is drawn, and the frames are drawn and saved in a background thread,
+so the simulation runs at close to its normal speed.
+'''
+import time
+import rendering
+import sweep
+
+#------------------ Tunable Parameters -----------------------------------------------
+
+model = 'SIRQD' # One of 'SIR', 'SIRD', 'SIRQD' or 'SIRQD_hospital'
+parameters = {'N': 100, 'beta': 0.05, 'kappa': 0.5} # Any parameters to change from the defaults in sweep.py
+
+T = 2000 # The length of time the simulation will run for
+seed = None # Set to an integer to get the same animation every time
+
+output = './Plots/AgentAnimation.gif' # A folder, .gif or .mp4
+frame_every = 5 # Only every frame_every-th time step is drawn
+fps = 30 # The frame rate of the saved animation
+
+#--------------------------------------------------------------------------------------
+
+population = sweep.build_population(model, sweep.model_parameters(model, parameters), seed=seed)
+
+# Any other Population can be recorded instead, made with any of the functions in population.py, eg.
+# import population as pop
+# population = pop.create_home_population(20, 5, 10, 60.0, 50, 10, 10, 10.0, 0.05, 0.015, 800, 600, seed=seed)
+# population = pop.create_grouped_population([70, 30], 5, 15.0, 0.05, 0.015, 800, 600, mu=[0.015, 0.04], kappa=0.5, seed=seed)
+
+recorder = rendering.Recorder(output, population.width, population.height, population.radius, every=frame_every, fps=fps)
+
+start = time.perf_counter()
+for i in range(T):
+	population.step()
+	recorder.record(population)
+print(f'Simulation finished in {time.perf_counter() - start:.1f} seconds')
+
+recorder.close()
+print(f'Saved {recorder.frames} frames to {output} in {time.perf_counter() - start:.1f} seconds')
@@ -1,10 +1,13 @@
+'''
+This runs a simulation with home agents and superspreaders.
+Each home agent stays within a circle around its home, with neighbouring homes overlapping by overlap,
+while the superspreaders are free to move around the whole environment.
+It can be run with or without animation by setting the ANIMATION_FLAG to true or false.
+The simulation itself runs without pygame, and if animated, snapshots of it are played back once it has finished.
+'''
 import numpy as np
-import pygame
-import sys
-from pygame.locals import *
 import matplotlib.pyplot as plt
-import agents
-from random import random
+import population as pop
 
 ANIMATION_FLAG = True
 
@@ -23,93 +26,52 @@ home_people = init_S + init_I - super_spreaders
 
 people_per_home = 10
 home_number = home_people // people_per_home
+homes_per_row = 5
 
 radius = 10.0
 home_radius = 60.0
 
-columns = 8
+overlap = 50 # How much neighbouring homes overlap
 
-overlap = 50
-w_offset = (overlap)/2
-h_offset = (overlap)/2
+seed = None # Set to an integer to get the same simulation every time
 
-homes = []
-for i in range(columns):
-	for j in range(home_number//columns):
-		homes.append(np.array([w_offset + home_radius + i*(width-overlap)//columns, h_offset + home_radius+j*(height-overlap)//(home_number//columns)]))
+frame_every = 1 # Only every frame_every-th time step is drawn in the animation
 
 
-WHITE = (255,255,255)
-screen = pygame.display.set_mode((width,height))
-screen.fill(WHITE)
-clock = pygame.time.Clock()
+# This set ups the simulation using a function defined in population.py
+# The super spreaders are put in group 1, so that they are counted separately
+population = pop.create_home_population(home_number, homes_per_row, people_per_home, home_radius, overlap, super_spreaders, init_I,
+										radius, beta, gamma, width, height, seed=seed)
 
 
-population = []
+if ANIMATION_FLAG: # Some set up for animation
+	import pygame
+	import rendering
+	snapshots = rendering.SnapshotBuffer(every=frame_every)
 
-for i in range(people_per_home):
+	homes = np.unique(population.home[population.group == 0], axis=0)
 
-	for home in homes:
+	def draw_homes(screen, snapshot):
+		for home in homes:
+			pygame.draw.circle(screen, color=(0,0,0) ,center= home, radius = 2)
+			pygame.draw.circle(screen, color=(0,0,0) ,center= home, radius = home_radius, width=1)
 
-		x = home[0] + (random()-0.5)*home_radius
-		y = home[1] + (random()-0.5)*home_radius
 
+# Runs the simulation, recording the number of agents in each category at each time step.
+# Without an animation to show, the simulation stops once nobody's status can change any more,
+# and the rest of the counts are filled in, see simulate in population.py.
+def record(population):
+	if ANIMATION_FLAG:
+		snapshots.record(population)
+	return np.append(population.counts(), population.group_counts[1, pop.I])
 
-		xspeed = (random() - 0.5)*2
-		yspeed = (random() - 0.5)*2
+counts = pop.simulate(population, T, record, stop_early=not ANIMATION_FLAG)
+Sarray, Iarray, Rarray = counts[:, [pop.S, pop.I, pop.R]].T
+super_spreader_array = counts[:, -1]
 
-		population.append( agents.HomePerson(position=np.array([x,y]), velocity=np.array([xspeed, yspeed]), home=home, home_size=home_radius, status='S', \
-			radius=radius , gamma=gamma, beta=beta, width=width, height=height) )
-
-
-
-for person in agents.setup_simulation(super_spreaders,0, radius=radius, beta=beta,gamma=gamma,height=height,width=width):
-	population.append(person)
-
-
-agents.initial_infection(init_I, population)
-
-Sarray = np.zeros(T)
-Iarray = np.zeros(T)
-Rarray = np.zeros(T)
-
-super_spreader_array = np.zeros(T)
-
-
-for i in range(T):
-
-	clock.tick(60)
-
-	for event in pygame.event.get():
-		if event.type == pygame.QUIT:
-			sys.exit()
-	
-	for person in population:
-		for otherperson in population:
-			if person==otherperson:
-				continue
-			person.infect(otherperson)
-		if i % 10 == 0:
-			person.status_update()
-
-		person.position_update()			
-		
-		person.draw(screen)
-
-		if person.status == 'S':
-			Sarray[i] += 1
-		elif person.status == 'I':
-			Iarray[i] += 1
-			if type(person) == agents.Person:
-				super_spreader_array[i] += 1
-		elif person.status == 'R':
-			Rarray[i] += 1
-
-	pygame.display.update()
-	screen.fill(WHITE)
-	for home in homes:
-		pygame.draw.circle(screen, color=(0,0,0) ,center= home, radius = 2)
-		pygame.draw.circle(screen, color=(0,0,0) ,center= home, radius = home_radius, width=1)	
+# Play back the animation
+if ANIMATION_FLAG:
+	rendering.Viewer(width, height, radius, extras=draw_homes).play(snapshots)
 
 
 plt.plot(Sarray, label='Susceptible', color=(0,0,1))
@@ -122,4 +84,4 @@ plt.ylabel("Number of people")
 plt.title("Agent Based status Model")
 plt.legend(loc=0)
 
-plt.savefig("./Plots/HomeAgentWOverlapAnimated.png")
\ No newline at end of file
+plt.savefig("./Plots/HomeAgentWOverlapAnimated.png")
@@ -3,10 +3,17 @@ This runs repeated simulations of the model with just the base Person agent that
 The same simulation as is run in SimpleAgentModel.py.
 As these are repeated simulations, and can take a bit of time, there is no option to animate.
 If an animation is required, us the SimpleAgentModel.py script.
-The data from the simulations is written to a file and saved in the data folder.
+The repeats are run in parallel, one per CPU, using the vectorised Population engine in population.py.
+The data from the simulations is written to a binary file in the data folder as the simulations run, see trajectories.py.
+If the script is stopped part way through, running it again with RESUME set carries on from where it got to.
 '''
+from functools import partial
+import os
 import numpy as np
-import agents
+import batch
+import population
+import seeding
+import trajectories
 
 width, height = 600, 600
 
@@ -20,31 +27,28 @@ N = 200
 init_I = 5
 
 repeats = 10
+seed = None # Set this to an integer to get the same results every time
 
-data = np.zeros([repeats*T,3])
+workers = None # The number of processes to use, None uses one per CPU
 
-for k in range(repeats):
+RESUME = True # Carry on with an unfinished set of runs, rather than starting again
 
-	population = agents.create_SIR_population(N, init_I, radius, beta, gamma, width, height)
+path = 'Data/RepeatedSIRModel'
 
-	for i in range(T):
 
-		for person in population:
-			for otherperson in population:
-				if person==otherperson:
-					continue
-				person.infect(otherperson)
-			if i % 10 == 0:
-				person.status_update()
-			
-			person.position_update()
+if __name__ == '__main__':
 
-			if person.status == 'S':
-				data[i + k*T, 0] += 1
-			elif person.status == 'I':
-				data[i + k*T, 1] += 1
-			else:
-				data[i + k*T, 2] += 1
+	build = partial(population.create_population, N, init_I, radius, beta, gamma, width, height)
+	columns = ['S', 'I', 'R']
+	parameters = dict(beta=beta, gamma=gamma, N=N, init_I=init_I, radius=radius, width=width, height=height)
 
+	if RESUME and os.path.exists(path + '.json'):
+		# Carry on with the seed the runs were started with, as long as nothing else has changed
+		seed = trajectories.resumable_metadata(path, repeats, T, columns, **parameters)['parameters']['seed']
+	else:
+		seed = seeding.entropy(seed) # So that the seed used is recorded, even when none is given
 
-np.savetxt('Data/RepeatedSIRModel.csv', data, fmt = '%.1f', delimiter=",", header="S,I,R")
\ No newline at end of file
+		# The results are written to the data folder as the simulations run
+		trajectories.TrajectoryWriter.create(path, repeats, T, columns, dtype=np.min_scalar_type(N), seed=seed, **parameters)
+
+	batch.run_repeats(build, T, repeats, seed=seed, record=batch.SIR_counts, workers=workers, path=path)
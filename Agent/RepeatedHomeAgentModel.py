@@ -1,12 +1,18 @@
 '''
 This is for repeated simulations using the models with home agents and superspreaders.
 There are no animations, as the script can take a while to run.
-The data from the is written to a file in the data folder.
+The repeats are run in parallel, one per CPU, using the vectorised Population engine in population.py.
+The data from the simulations is written to a binary file in the data folder as the simulations run, see trajectories.py,
+with the number of Infectious superspreaders recorded alongside the Susceptible, Infectious and Recovered agents.
+If the script is stopped part way through, running it again with RESUME set carries on from where it got to.
 '''
+from functools import partial
+import os
 import numpy as np
-import agents
-from random import random
-from tqdm import tqdm
+import batch
+import population
+import seeding
+import trajectories
 
 # Set up
 
@@ -25,70 +31,43 @@ home_people = init_S + init_I - super_spreaders
 
 people_per_home = 5
 home_number = home_people // people_per_home
+homes_per_row = 8
 
 radius = 10.0
 home_radius = 70.0
 
-columns = 5
-offset = 10
-
-
-homes = []
-for i in range(columns):
-	for j in range(home_number//columns):
-		homes.append(np.array([offset + home_radius + i*width//columns, offset + home_radius+j*height//(home_number//columns)]))
-
-
-# Running the Repeated Simulations
+overlap = 75 # How much neighbouring homes overlap
 
 repeats = 10
+seed = None # Set this to an integer to get the same results every time
 
-data = np.zeros([repeats*T,4])
-
-for k in tqdm( range(repeats) , desc="Loading…", ascii=False, ncols=75 ):
-
-	population = []
+workers = None # The number of processes to use, None uses one per CPU
 
-	for i in  range(people_per_home):
+RESUME = True # Carry on with an unfinished set of runs, rather than starting again
 
-		for home in homes:
+path = 'Data/HomeAgentWOverlap_70'
 
-			x = home[0] + (random()-0.5)*home_radius
-			y = home[1] + (random()-0.5)*home_radius
-
-
-			xspeed = (random() - 0.5)*2
-			yspeed = (random() - 0.5)*2
-
-			population.append( agents.HomePerson(position=np.array([x,y]), velocity=np.array([xspeed, yspeed]), home=home, home_size=home_radius, status='S', \
-				radius=radius , gamma=gamma, beta=beta, width=600, height=600) )
-
-
-	for person in agents.setup_simulation(super_spreaders,0, radius=radius, beta=beta,gamma=gamma,height=height,width=width):
-		population.append(person)
 
+# Running the Repeated Simulations
 
-	agents.initial_infection(init_I, population)
+if __name__ == '__main__':
 
-	for i in range(T):
+	build = partial(population.create_home_population, home_number, homes_per_row, people_per_home, home_radius, overlap,
+					super_spreaders, init_I, radius, beta, gamma, width, height)
 
-		for person in population:
-			for otherperson in population:
-				if person==otherperson:
-					continue
-				person.infect(otherperson)
-			if i % 10 == 0:
-				person.status_update()
-			person.postition_update()
+	columns = ['S', 'I', 'R', 'SuperSpreader']
+	parameters = dict(beta=beta, gamma=gamma, init_S=init_S, init_I=init_I, super_spreaders=super_spreaders,
+						people_per_home=people_per_home, homes_per_row=homes_per_row, home_radius=home_radius,
+						overlap=overlap, radius=radius, width=width, height=height)
 
-			if person.status == 'S':
-				data[i + k*T, 0] += 1
-			elif person.status == 'I':
-				data[i + k*T, 1] += 1
-				if type(person) == agents.Person:
-					data[i + k*T, 3] += 1
-			elif person.status == 'R':
-				data[i + k*T, 2] += 1
+	if RESUME and os.path.exists(path + '.json'):
+		# Carry on with the seed the runs were started with, as long as nothing else has changed
+		seed = trajectories.resumable_metadata(path, repeats, T, columns, **parameters)['parameters']['seed']
+	else:
+		seed = seeding.entropy(seed) # So that the seed used is recorded, even when none is given
 
+		# The results are written to the data folder as the simulations run
+		trajectories.TrajectoryWriter.create(path, repeats, T, columns, dtype=np.min_scalar_type(init_S + init_I),
+											seed=seed, **parameters)
 
-np.savetxt('Data/HomeAgentWOverlap_70_Data.csv', data, fmt = '%.1f', delimiter=",", header="S,I,R,SuperSpreader")
\ No newline at end of file
+	batch.run_repeats(build, T, repeats, seed=seed, record=batch.super_spreader_counts, workers=workers, path=path)
@@ -0,0 +1,42 @@
+'''
+This runs a parameter sweep of the SIRQD model, over a grid of infection and quarantine rates,
+using the functions in sweep.py. Each point of the grid is run a number of times, in parallel,
+and the average number of deaths at the end of the simulations is plotted.
+The results of each point are cached in the Data/SweepCache folder, so running the script again,
+or with a finer grid, only runs the points that haven't been run before.
+'''
+import numpy as np
+import matplotlib.pyplot as plt
+import sweep
+
+#------------------ Tunable Parameters -----------------------------------------------
+
+T = 2000 # The length of time each simulation runs for
+
+betas = [0.02, 0.05, 0.1, 0.2] # The infection rates to sweep over
+kappas = [0.0, 0.25, 0.5, 0.75] # The quarantine rates to sweep over
+
+fixed = {'N': 100, 'gamma': 0.015, 'mu': 0.015} # Parameters that are the same for every point
+
+repeats = 5 # The number of times each point is run
+seed = 0
+
+#--------------------------------------------------------------------------------------
+
+if __name__ == '__main__':
+
+	points = [dict(fixed, **point) for point in sweep.grid(beta=betas, kappa=kappas)]
+	results = sweep.run_sweep('SIRQD', points, T, repeats=repeats, seed=seed)
+
+	# The average number of dead agents at the end of the simulations
+	deaths = np.array([data[:, -1, 3].mean() for data in results]).reshape(len(betas), len(kappas))
+
+	plt.imshow(deaths, origin='lower', cmap='Greys')
+	plt.colorbar(label='Number of deaths')
+	plt.xticks(range(len(kappas)), kappas)
+	plt.yticks(range(len(betas)), betas)
+	plt.xlabel("Quarantine rate")
+	plt.ylabel("Infection rate")
+	plt.title("Agent Based SIRQD Model: Final Deaths")
+
+	plt.savefig("./Plots/SweepSIRQDModel.png")
@@ -2,12 +2,17 @@
 This is the backend of the simulations, where the agent classes are defined, 
 along with other functions for the setup of the simulations.
 The Person class is the base class, with most of the others being extensions of this.
+Every agent draws its random numbers from rng, a random.Random shared by the agents of a population,
+so that a population made with a seed always behaves the same, see seeding.py.
+Without one, the agents share the global random module.
 '''
-from random import random, shuffle
+import random
 import numpy as np
-import pygame
+import seeding
+from status import Status, as_status, new_velocity, STOP, MOVE, SIR_TRANSITIONS, SIRD_TRANSITIONS, SIRQD_TRANSITIONS
 
-# ------------- Some functions and set up for Pygame animations -------------------------------
+# ------------- Colours of the agents in animations -------------------------------------------
+# The drawing itself is done in rendering.py, so that pygame is only imported when animating.
 
 RED = (255,0,0,180)
 BLUE = (0,0,255,180)
@@ -15,14 +20,8 @@ GREEN = (0,255,0,180)
 GREY = (84,84,84,180)
 PURPLE = (128,0,128,180)
 
-def draw_circle_alpha(surface, color, center, radius):
-
-	# Special function so that the circles representing the agents can have transparency.
-
-    target_rect = pygame.Rect(center, (0, 0)).inflate((radius * 2, radius * 2))
-    shape_surf = pygame.Surface(target_rect.size, pygame.SRCALPHA)
-    pygame.draw.circle(shape_surf, color, (radius, radius), radius)
-    surface.blit(shape_surf, target_rect)
+# The colour of the agents with each status code, in the order of the Status codes in status.py
+STATUS_COLORS = [BLUE, GREEN, RED, GREY, PURPLE]
 
 
 # ------------- Agent classes used in simulations --------------------------------------------
@@ -31,42 +30,45 @@ class Person:
 
 	'''
 	This is the base class for the agents. It has a init, draw, infect and update method.
-	Generally, only the init and update methods change in the extended classes.
+	Generally, only the init and the transitions change in the extended classes.
 	It has three status options; Susceptible, Infectious or Recovered.
 	The infection rate is controlled by parameter beta.
 	The recovery rate is controlled by parameter gamma.
+	The changes of status other than infection are given by the table of transitions, see status.py.
 	'''
+
+	transitions = SIR_TRANSITIONS
 	
-	def __init__(self, position, velocity, radius, gamma, beta, width, height, status='S'):
+	def __init__(self, position, velocity, radius, gamma, beta, width, height, status='S', rng=None):
 		self.position = position # The postition of the agent
-		self.status = status # The health status of the agent
+		self.status = as_status(status) # The health status of the agent, which can be given as a letter or a Status
 		self.velocity = velocity # The velocity of the agent
 		self.radius = radius # The radius of the agent
 		self.gamma = gamma # The recovery rate of the disease
 		self.beta = beta # The infection rate of the disease
 		self.width = width # This is the width of the environment it is contained in.
 		self.height = height # This is the height of the environment it is contained in.
+		self.rng = random if rng is None else rng # Where the agent's random numbers come from
 
-		if self.status == 'S':    # We only ever initialise an agent with status = 'S' or 'I'
-			self.color = BLUE
-		elif self.status == 'I':
-			self.color = GREEN
+	@property
+	def color(self):
+		return STATUS_COLORS[self.status]
 
 	def draw(self, screen):
 
 	# Draws agent on screen.
+		from rendering import draw_circle_alpha
 		draw_circle_alpha(screen, self.color, self.position, self.radius)
 
 		
 	def infect(self, other):
 
 	# Method for an agent to infect another agent.
-		if self.status =='S' and other.status =='I':
+		if self.status == Status.S and other.status == Status.I:
 			distance = np.linalg.norm(self.position - other.position)
 			
-			if distance <1.5*self.radius and  random() < self.beta:
-				self.status = 'I'
-				self.color = GREEN
+			if distance <1.5*self.radius and  self.rng.random() < self.beta:
+				self.status = Status.I
 
 	def position_update(self):
 
@@ -79,12 +81,34 @@ class Person:
 
 		self.position += self.velocity
 		
-	def status_update(self):
+	def status_update(self, mu_factor=1.0, draws=None):
+
+	# Goes through the agent's transitions in order, eg. from Infectious to Recovered, and makes at most one of them happen.
+	# mu_factor multiplies the death rate, eg. when the hospitals are overwhelmed.
+	# draws are three random numbers between 0 and 1, one to pick the transition and two for a new velocity,
+	# so that they can be drawn for the whole population at once, see update_statuses. See status.py for how they are used.
+		if draws is None:
+			draws = (self.rng.random(), self.rng.random(), self.rng.random())
+
+		lower, remaining = 0.0, 1.0
+		for transition in self.transitions:
+			if self.status != transition.source:
+				continue
 
-	# Controls when agent turns from Infectious to Recovered.
-		if self.status == 'I' and random() < self.gamma:
-			self.status = 'R'
-			self.color = RED
+			chance = remaining*getattr(self, transition.rate)
+			if transition.rate == 'mu':
+				chance *= mu_factor
+
+			if lower <= draws[0] < lower + chance:
+				self.status = transition.target
+				if transition.effect == STOP:
+					self.velocity = np.array([0, 0])
+				elif transition.effect == MOVE:
+					self.velocity = new_velocity(np.array(draws[1:3]))
+				return
+
+			lower += chance
+			remaining -= chance
 
 
 
@@ -96,21 +120,11 @@ class DeathPerson(Person):
 	In animation, when an agent has status Dead, it will be coloured grey and it will stop moving.
 	'''
 
-	def __init__(self, position, velocity, radius, gamma, beta, mu, width, height, status):
-		self.mu = mu # The death rate of the disease
-		Person.__init__(self, position, velocity, radius, gamma, beta, width, height, status)
-
+	transitions = SIRD_TRANSITIONS
 
-	def status_update(self):
-
-		if self.status == 'I' and random() < self.gamma:
-			self.status = 'R'
-			self.color = RED
-
-		if self.status == 'I' and random() < self.mu:
-			self.status = 'D'
-			self.color = GREY
-			self.velocity = np.array([0, 0])
+	def __init__(self, position, velocity, radius, gamma, beta, mu, width, height, status, rng=None):
+		self.mu = mu # The death rate of the disease
+		Person.__init__(self, position, velocity, radius, gamma, beta, width, height, status, rng)
 
 
 class QuarantineDeathPerson(DeathPerson):
@@ -122,82 +136,43 @@ class QuarantineDeathPerson(DeathPerson):
 	Thus someone leaves quarantine if they have either recovered or died.
 	'''
 
-	def __init__(self, position, velocity, radius, gamma, beta, mu, kappa, width, height, status):
+	transitions = SIRQD_TRANSITIONS
+
+	def __init__(self, position, velocity, radius, gamma, beta, mu, kappa, width, height, status, rng=None):
 
 		self.kappa = kappa # The chance of being quarantined after infection
-		DeathPerson.__init__(self, position, velocity, radius, gamma, beta, mu, width, height, status)
+		DeathPerson.__init__(self, position, velocity, radius, gamma, beta, mu, width, height, status, rng)
 
 
 	def infect(self, other):
 
 	# Method for an agent to infect another agent.
 
-		if self.status =='S' and other.status =='I':
+		if self.status == Status.S and other.status == Status.I:
 			distance = np.linalg.norm(self.position - other.position)
 			
-			if distance <1.5*self.radius and  random() < self.beta:
+			if distance <1.5*self.radius and  self.rng.random() < self.beta:
 			
-				if random() < self.kappa:
-					self.status = 'Q'
-					self.color = PURPLE
+				if self.rng.random() < self.kappa:
+					self.status = Status.Q
 					self.velocity = np.array([0,0])
 				else:
-					self.status = 'I'
-					self.color = GREEN
-
-
-	def status_update(self):
-
-	# Keeps agent moving and inside given area. Also controls when it recovers or dies from disease.
-
-		if self.status == 'I' and random() < self.gamma:
-			self.status = 'R'
-			self.color = RED
-
-		if self.status == 'I' and random() < self.mu:
-			self.status = 'D'
-			self.color = GREY
-			self.velocity = np.array([0, 0])
+					self.status = Status.I
 
-		if self.status == 'Q' and random() < self.gamma:
-			self.status = 'R'
-			self.color = RED
-			self.velocity = np.array([(random() - 0.5)*2,(random() - 0.5)*2]) 
-
-		if self.status == 'Q' and random() < self.mu:
-			self.status = 'D'
-			self.color = GREY
-			self.velocity = np.array([0,0])
-				
 
 
 
 class Hospital_Limit_Person(QuarantineDeathPerson):
 
-	def __init__(self, position, velocity, radius, gamma, beta, mu, kappa, width, height, status, hospital_factor):
-		self.hospital_factor = hospital_factor
-		QuarantineDeathPerson.__init__(self, position, velocity, radius, gamma, beta, mu, kappa, width, height, status)
-
-
-	def hospital_status_update(self):
-		if self.status == 'I' and random() < self.gamma:
-			self.status = 'R'
-			self.color = RED
-
-		if self.status == 'I' and random() < self.hospital_factor*self.mu:
-			self.status = 'D'
-			self.color = GREY
-			self.velocity = np.array([0, 0])
-
-		if self.status == 'Q' and random() < self.gamma:
-			self.status = 'R'
-			self.color = RED
-			self.velocity = np.array([(random() - 0.5)*2,(random() - 0.5)*2]) 
+	'''
+	A QuarantineDeathPerson whose death rate is multiplied by hospital_factor when the hospitals are overwhelmed.
+	Whether they are is worked out once per time step for the whole population, with a hospital.HospitalLimit,
+	and the factor is then passed to status_update, see update_statuses.
+	'''
 
-		if self.status == 'Q' and random() < self.hospital_factor*self.mu:
-			self.status = 'D'
-			self.color = GREY
-			self.velocity = np.array([0,0])
+	def __init__(self, position, velocity, radius, gamma, beta, mu, kappa, width, height, status, hospital_factor, rng=None):
+		self.hospital_factor = hospital_factor
+		QuarantineDeathPerson.__init__(self, position, velocity, radius, gamma, beta, mu, kappa, width, height, status, rng)
 
 
 class HomePerson(Person):
@@ -207,11 +182,11 @@ class HomePerson(Person):
 	This is to simulate more closely real world, heterogeneous population mixing.
 	'''
 	
-	def __init__(self, home, home_size, position, velocity, radius, gamma, beta, width, height, status):
+	def __init__(self, home, home_size, position, velocity, radius, gamma, beta, width, height, status, rng=None):
 		
 		self.home = home
 		self.home_size = home_size
-		Person.__init__(self, position, velocity, radius, gamma, beta, width, height, status)
+		Person.__init__(self, position, velocity, radius, gamma, beta, width, height, status, rng)
 
 	def position_update(self):
 
@@ -233,124 +208,265 @@ class HomePerson(Person):
 		
 
 
+# ----------------- Spatial hash for finding contacts -------------------------------------------------------------
+
+class SpatialHash:
+
+	'''
+	A uniform grid over the environment, used so that an agent only tries to infect the agents near it.
+	It is rebuilt at the start of every time step. Each agent is put in a square cell, and when looking for contacts
+	only the agent's own cell and the eight cells around it are checked, instead of the whole population.
+	The cells are a bit bigger than the infection distance of 1.5*radius, as agents earlier in the population
+	have already moved once by the time the later agents look for contacts.
+	'''
+
+	def __init__(self, population, cell_size=None):
+		if cell_size is None:
+			cell_size = contact_cell_size(population)
+		self.cell_size = cell_size
+		self.cells = {}
+
+		for person in population:
+			self.cells.setdefault(self.cell(person.position), []).append(person)
+
+	def cell(self, position):
+
+	# The grid cell a position falls in.
+		return (int(position[0] // self.cell_size), int(position[1] // self.cell_size))
+
+	def neighbours(self, person):
+
+	# All the other agents in the same or an adjacent cell.
+		cx, cy = self.cell(person.position)
+		for dx in (-1, 0, 1):
+			for dy in (-1, 0, 1):
+				for other in self.cells.get((cx + dx, cy + dy), ()):
+					if other is not person:
+						yield other
+
+
+def contact_cell_size(population):
+
+	# Infection distance plus the furthest an agent can move in one time step. This is the full speed rather than
+	# the largest velocity component, as a HomePerson bouncing off its home boundary turns its velocity.
+	radius = max(person.radius for person in population)
+	speed = max(np.linalg.norm(person.velocity) for person in population)
+	return max(1.5*radius + speed, 1.0)
+
+
+def infection_sweep(population):
+
+	# Lets every Infectious agent try to infect the Susceptible agents near it, instead of every agent trying every
+	# agent near it, as only those pairs can lead to an infection. Early and late in an epidemic, when there are
+	# few Infectious agents, this is much less work. Agents infected during the sweep can't infect others until the
+	# next time step, as in the Population class.
+	susceptible = [person for person in population if person.status == Status.S]
+	infectious = [person for person in population if person.status == Status.I]
+	if not susceptible or not infectious:
+		return
+
+	grid = SpatialHash(susceptible, 1.5*max(person.radius for person in population))
+	for person in infectious:
+		for other in grid.neighbours(person):
+			other.infect(person)
+
+
+def update_statuses(population, mu_factor=1.0, rng=None):
+
+	# Updates the status of every agent in a population, drawing all the random numbers needed with one call to
+	# a numpy Generator, rng, instead of a few calls to random() for every agent.
+	# Without one, a Generator is seeded from the agents' own random numbers, so seeded populations stay reproducible.
+	if rng is None:
+		rng = np.random.default_rng(population[0].rng.getrandbits(64))
+
+	draws = rng.random((len(population), 3))
+	for person, row in zip(population, draws):
+		person.status_update(mu_factor, row)
+
+
+def status_counts(population):
+
+	# The number of agents with each status, in the order of the Status codes.
+	return np.bincount([int(person.status) for person in population], minlength=len(Status))
+
+
 # ----------------- Functions for initialising simulations --------------------------------------------------------
 
-def initial_infection(init_I, population):
+def initial_infection(init_I, population, rng=random):
 
 	# Given a population, possibly of different agent classes; infects a random subset of given size
 
-	shuffle(population)
+	rng.shuffle(population)
 	for i in range(init_I):
-		person = population[int((random() * len(population)))]
-		person.status = "I"
-		person.color = GREEN
+		person = population[int((rng.random() * len(population)))]
+		person.status = Status.I
 
 
-def create_SIR_population(N, init_I, radius, beta, gamma, width, height):
+def create_SIR_population(N, init_I, radius, beta, gamma, width, height, seed=None):
 
 	# Creates an array of agents.
+	rng = seeding.stdlib_random(seed)
 	population = []
 
 	for i in range(N):
-		x = radius + random()*(width - 2*radius)
-		y = radius + random()*(height - 2*radius)
+		x = radius + rng.random()*(width - 2*radius)
+		y = radius + rng.random()*(height - 2*radius)
 
-		xspeed = (random() - 0.5)*3
-		yspeed = (random() - 0.5)*3
+		xspeed = (rng.random() - 0.5)*3
+		yspeed = (rng.random() - 0.5)*3
 
 		population.append( Person(position=np.array([x,y]), velocity=np.array([xspeed, yspeed]), status='S', radius=radius, \
-									gamma=gamma, beta=beta, width=width, height=height) )
+									gamma=gamma, beta=beta, width=width, height=height, rng=rng) )
 
-	initial_infection(init_I, population)
+	initial_infection(init_I, population, rng)
 
 	return population
 
 
-def create_SIRD_population(N, init_I, radius, beta, gamma, mu, width, height):
+def create_SIRD_population(N, init_I, radius, beta, gamma, mu, width, height, seed=None):
 
 	# Creates an array of agents.
+	rng = seeding.stdlib_random(seed)
 	population = []
 
 	for i in range(N):
-		x = radius + random()*(width - 2*radius)
-		y = radius + random()*(height - 2*radius)
+		x = radius + rng.random()*(width - 2*radius)
+		y = radius + rng.random()*(height - 2*radius)
 
-		xspeed = (random() - 0.5)*3
-		yspeed = (random() - 0.5)*3
+		xspeed = (rng.random() - 0.5)*3
+		yspeed = (rng.random() - 0.5)*3
 
 		population.append( DeathPerson(position=np.array([x,y]), velocity=np.array([xspeed, yspeed]), status='S', radius=radius, \
-										gamma=gamma, beta=beta, mu=mu, width=width, height=height) )
+										gamma=gamma, beta=beta, mu=mu, width=width, height=height, rng=rng) )
 
-	initial_infection(init_I, population)
+	initial_infection(init_I, population, rng)
 	
 	return population
 
 
-def create_SIRQD_population(N, init_I, radius, beta, gamma, mu, kappa, width, height):
+def create_SIRQD_population(N, init_I, radius, beta, gamma, mu, kappa, width, height, seed=None):
 
 	# Creates an array of agents.
+	rng = seeding.stdlib_random(seed)
 	population = []
 
 	for i in range(N):
-		x = radius + random()*(width - 2*radius)
-		y = radius + random()*(height - 2*radius)
+		x = radius + rng.random()*(width - 2*radius)
+		y = radius + rng.random()*(height - 2*radius)
 
-		xspeed = (random() - 0.5)*3
-		yspeed = (random() - 0.5)*3
+		xspeed = (rng.random() - 0.5)*3
+		yspeed = (rng.random() - 0.5)*3
 
 		population.append( QuarantineDeathPerson(position=np.array([x,y]), velocity=np.array([xspeed, yspeed]), status='S', radius=radius, \
-												gamma=gamma, beta=beta, mu=mu, kappa=kappa, width=width, height=height) )
+												gamma=gamma, beta=beta, mu=mu, kappa=kappa, width=width, height=height, rng=rng) )
 
-	initial_infection(init_I, population)
+	initial_infection(init_I, population, rng)
 
 	return population
 
 
-def create_SIRQD_population_with_age_profile(N_old, N_young, init_I, radius, beta, gamma, old_mu, young_mu, kappa, width, height):
+def create_SIRQD_population_with_age_profile(N_old, N_young, init_I, radius, beta, gamma, old_mu, young_mu, kappa, width, height, seed=None):
 
 	# Creates an array of agents.
+	rng = seeding.stdlib_random(seed)
 	population = []
 
 	for _ in range(N_old):
-		x = radius + random()*(width - 2*radius)
-		y = radius + random()*(height - 2*radius)
+		x = radius + rng.random()*(width - 2*radius)
+		y = radius + rng.random()*(height - 2*radius)
 
-		xspeed = (random() - 0.5)*3
-		yspeed = (random() - 0.5)*3
+		xspeed = (rng.random() - 0.5)*3
+		yspeed = (rng.random() - 0.5)*3
 
 		population.append( QuarantineDeathPerson(position=np.array([x,y]), velocity=np.array([xspeed, yspeed]), status='S', radius=radius, \
-												gamma=gamma, beta=beta, mu=old_mu, kappa=kappa, width=width, height=height) )
+												gamma=gamma, beta=beta, mu=old_mu, kappa=kappa, width=width, height=height, rng=rng) )
 
 	for _ in range(N_young):
-		x = radius + random()*(width - 2*radius)
-		y = radius + random()*(height - 2*radius)
+		x = radius + rng.random()*(width - 2*radius)
+		y = radius + rng.random()*(height - 2*radius)
 
-		xspeed = (random() - 0.5)*3
-		yspeed = (random() - 0.5)*3
+		xspeed = (rng.random() - 0.5)*3
+		yspeed = (rng.random() - 0.5)*3
 
 		population.append( QuarantineDeathPerson(position=np.array([x,y]), velocity=np.array([xspeed, yspeed]), status='S', radius=radius, \
-												gamma=gamma, beta=beta, mu=young_mu, kappa=kappa, width=width, height=height) )
+												gamma=gamma, beta=beta, mu=young_mu, kappa=kappa, width=width, height=height, rng=rng) )
 
-	initial_infection(init_I, population)
+	initial_infection(init_I, population, rng)
 
 	return population
 
 
-def create_SIRQD_population_with_hospital_limit(N, init_I, radius, beta, gamma, mu, kappa, width, height, hospital_factor):
+def create_SIRQD_population_with_hospital_limit(N, init_I, radius, beta, gamma, mu, kappa, width, height, hospital_factor, seed=None):
 
 	# Creates an array of agents.
+	rng = seeding.stdlib_random(seed)
 	population = []
 
 	for i in range(N):
-		x = radius + random()*(width - 2*radius)
-		y = radius + random()*(height - 2*radius)
+		x = radius + rng.random()*(width - 2*radius)
+		y = radius + rng.random()*(height - 2*radius)
 
-		xspeed = (random() - 0.5)*3
-		yspeed = (random() - 0.5)*3
+		xspeed = (rng.random() - 0.5)*3
+		yspeed = (rng.random() - 0.5)*3
 
 		population.append( Hospital_Limit_Person(position=np.array([x,y]), velocity=np.array([xspeed, yspeed]), status='S', radius=radius, \
-												gamma=gamma, beta=beta, mu=mu, kappa=kappa, width=width, height=height, hospital_factor=hospital_factor) )
+												gamma=gamma, beta=beta, mu=mu, kappa=kappa, width=width, height=height, hospital_factor=hospital_factor, rng=rng) )
+
+	initial_infection(init_I, population, rng)
 
-	initial_infection(init_I, population)
+	return population
+
+def home_centres(homes, homes_per_row, home_radius, overlap, width, height):
+
+	# The centres of homes laid out in rows of homes_per_row, in the middle of the environment.
+	# Neighbouring homes overlap by overlap, or have a gap between them if it's negative.
+	spacing = 2*home_radius - overlap
+	rows = -(-homes // homes_per_row)
+	column, row = np.arange(homes) % homes_per_row, np.arange(homes) // homes_per_row
+
+	x = (width - (min(homes, homes_per_row) - 1)*spacing)/2 + column*spacing
+	y = (height - (rows - 1)*spacing)/2 + row*spacing
+	return np.column_stack([x, y])
+
+
+def home_population_layout(homes, homes_per_row, people_per_home, home_radius, overlap, super_spreaders, radius, width, height, rng):
+
+	# The starting positions, velocities and homes of the agents in a population of homes and super spreaders,
+	# made all at once with the numpy Generator rng. The home people come first, people_per_home for each home,
+	# then the super spreaders, who have no home and can go anywhere.
+	home = np.repeat(home_centres(homes, homes_per_row, home_radius, overlap, width, height), people_per_home, axis=0)
+
+	home_position = home + (rng.random(home.shape) - 0.5)*home_radius
+	home_velocity = (rng.random(home.shape) - 0.5)*2
+
+	spreader_position = radius + rng.random((super_spreaders, 2))*(np.array([width, height]) - 2*radius)
+	spreader_velocity = (rng.random((super_spreaders, 2)) - 0.5)*3
 
-	return population
\ No newline at end of file
+	position = np.concatenate([home_position, spreader_position])
+	velocity = np.concatenate([home_velocity, spreader_velocity])
+	is_super_spreader = np.arange(len(position)) >= len(home)
+
+	return position, velocity, np.concatenate([home, np.zeros((super_spreaders, 2))]), is_super_spreader
+
+
+def create_home_population(homes, homes_per_row, people_per_home, home_radius, overlap, super_spreaders, init_I,
+							radius, beta, gamma, width, height, seed=None):
+
+	# Creates an array of HomePerson agents, people_per_home for each of the homes, along with super_spreaders agents
+	# of the base Person class, free to move around the whole environment.
+	rng = seeding.stdlib_random(seed)
+	position, velocity, home, is_super_spreader = home_population_layout(homes, homes_per_row, people_per_home, home_radius,
+														overlap, super_spreaders, radius, width, height, np.random.default_rng(rng.getrandbits(64)))
+	population = []
+
+	for i in range(len(position)):
+		if is_super_spreader[i]:
+			population.append( Person(position=position[i], velocity=velocity[i], status='S', radius=radius, \
+										gamma=gamma, beta=beta, width=width, height=height, rng=rng) )
+		else:
+			population.append( HomePerson(home=home[i], home_size=home_radius, position=position[i], velocity=velocity[i], status='S', \
+											radius=radius, gamma=gamma, beta=beta, width=width, height=height, rng=rng) )
+
+	initial_infection(init_I, population, rng)
+
+	return population
@@ -0,0 +1,90 @@
+'''
+Runs repeated simulations in parallel, without any animation.
+Each repeat is run in its own process, and is given its own random seed, spawned from one master seed
+using NumPy's SeedSequence. This means the repeats are independent of each other, and running
+with the same master seed gives the same results however many processes are used.
+The results are returned in the order of the repeats, as an array of shape (repeats, T, columns).
+If a path is given to write the results to, each process instead writes its results straight to disk,
+chunk time steps at a time, using a TrajectoryWriter from trajectories.py. This keeps the memory used
+the same no matter how many repeats or time steps are run.
+After every chunk the state of the repeat is checkpointed, so if the runs are stopped, running them again
+with the same path carries each unfinished repeat on from its last chunk, giving exactly the same results.
+'''
+from concurrent.futures import ProcessPoolExecutor
+import os
+from functools import partial
+import numpy as np
+from population import Population, simulate, S, I, R
+import seeding
+from trajectories import TrajectoryWriter, checkpoint_file, load_trajectories
+
+
+# ----------------- Functions for what is recorded at each time step ----------------------------------------------
+
+def SIR_counts(population):
+
+	# The number of Susceptible, Infectious and Recovered agents.
+	return population.counts()[[S, I, R]]
+
+
+def super_spreader_counts(population):
+
+	# As above, along with the number of Infectious super spreaders, who are the agents in group 1.
+	counts = population.counts()
+	return [counts[S], counts[I], counts[R], population.group_counts[1, I]]
+
+
+# ----------------- Running the repeats --------------------------------------------------------------------------
+
+def run_repeat(build, T, record, seed):
+
+	# Runs a single repeat. build is called with the repeat's seed and should return a Population.
+	population = build(seed=seed)
+	return simulate(population, T, record)
+
+
+def stream_repeat(build, T, record, path, chunk, repeat, seed):
+
+	# Runs a single repeat, writing the results to path every chunk time steps.
+	# A repeat that has already finished is skipped, and one that was stopped carries on from its checkpoint.
+	writer = TrajectoryWriter(path)
+	checkpoint = checkpoint_file(path, repeat)
+	if writer.progress[repeat] >= T and not os.path.exists(checkpoint):
+		return
+
+	population = build(seed=seed)
+	written = 0
+	if os.path.exists(checkpoint):
+		written = int(population.restore(checkpoint)['written'])
+
+	for start in range(written, T, chunk):
+		writer.write(repeat, start, simulate(population, min(chunk, T - start), record))
+		population.save(checkpoint, written=min(start + chunk, T))
+
+	os.remove(checkpoint)
+
+
+def run_repeats(build, T, repeats, seed=None, record=Population.counts, workers=None, path=None, chunk=1000):
+
+	# Runs repeats independent simulations of T time steps, spread over workers processes.
+	# build has to be a function defined at the top level of a module (or a functools.partial of one),
+	# so that it can be sent to the other processes. By default as many processes as CPUs are used.
+	# If path is given, it must have been set up with TrajectoryWriter.create, and the results are written there
+	# and returned memory mapped. Calling this again with the same path and seed resumes any unfinished repeats.
+	seeds = seeding.spawn(seed, repeats)
+	if path is None:
+		job = partial(run_repeat, build, T, record)
+		jobs = (seeds,)
+	else:
+		job = partial(stream_repeat, build, T, record, path, chunk)
+		jobs = (range(repeats), seeds)
+
+	if workers == 1:
+		results = list(map(job, *jobs))
+	else:
+		with ProcessPoolExecutor(max_workers=workers) as pool:
+			results = list(pool.map(job, *jobs))
+
+	if path is None:
+		return np.stack(results)
+	return load_trajectories(path)[0]
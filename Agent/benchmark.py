@@ -0,0 +1,217 @@
+'''
+Benchmarks for the simulation loop of the Agent scripts.
+For each agent class in agents.py, and each number of agents, the simulation is timed with both
+the old loop over agent objects, kept for comparison ('objects'), and the vectorised Population engine ('population').
+The size of the environment grows with the number of agents, so that the agents are always as crowded.
+Ticks per second, agent updates per second and the peak memory used are printed and saved to a json file,
+along with the git commit, so that results from different commits can be compared.
+With --home-index, the HomePerson populations are also timed looking for contacts home by home instead of
+with the grid, see Population.index_homes, which is shown and saved as the 'home index' engine.
+
+Run it with, eg.
+	python3 benchmark.py --sizes 100 1000 --out Data/Benchmarks/new.json --compare Data/Benchmarks/old.json
+'''
+import argparse
+import json
+import os
+import platform
+import subprocess
+import time
+import tracemalloc
+import numpy as np
+import agents
+from hospital import HospitalLimit
+import kernels
+from population import Population
+import seeding
+
+# The parameters from the Agent scripts, for an environment of 800x600 with 100 agents
+radius = 15.0
+beta, gamma, mu, kappa = 0.05, 0.015, 0.015, 0.5
+hospital_limit, hospital_factor = 15, 2
+home_radius = 60.0
+init_I = 5
+
+SIZES = [100, 1000, 10000]
+TICKS = {100: 500, 1000: 100, 10000: 20} # The default number of ticks for each number of agents
+CLASSES = ['Person', 'DeathPerson', 'QuarantineDeathPerson', 'Hospital_Limit_Person', 'HomePerson']
+ENGINES = ['objects', 'population']
+
+
+# ----------------- Setting up the populations --------------------------------------------------------------------
+
+def environment(N):
+
+	# The size of the environment, scaled so that there are always 100 agents per 800x600.
+	scale = np.sqrt(N/100)
+	return 800*scale, 600*scale
+
+
+def home_layout(N, width, height):
+
+	# The homes for N agents, one for every five agents after one in twenty are made super spreaders,
+	# laid out on a grid that fills the environment.
+	super_spreaders = N // 20
+	homes = (N - super_spreaders) // 5
+	homes_per_row = int(np.ceil(np.sqrt(homes*width/height)))
+	overlap = 2*home_radius - width/homes_per_row
+	return homes, homes_per_row, 5, home_radius, overlap, super_spreaders
+
+
+def create(agent_class, N, seed=None):
+
+	# Creates a population of N agents of the given class.
+	width, height = environment(N)
+
+	if agent_class == 'Person':
+		return agents.create_SIR_population(N, init_I, radius, beta, gamma, width, height, seed=seed)
+	if agent_class == 'DeathPerson':
+		return agents.create_SIRD_population(N, init_I, radius, beta, gamma, mu, width, height, seed=seed)
+	if agent_class == 'QuarantineDeathPerson':
+		return agents.create_SIRQD_population(N, init_I, radius, beta, gamma, mu, kappa, width, height, seed=seed)
+	if agent_class == 'Hospital_Limit_Person':
+		return agents.create_SIRQD_population_with_hospital_limit(N, init_I, radius, beta, gamma, mu, kappa, width, height, hospital_factor, seed=seed)
+	if agent_class == 'HomePerson':
+		return agents.create_home_population(*home_layout(N, width, height), init_I, radius, beta, gamma, width, height, seed=seed)
+	raise ValueError(f"Unknown agent class {agent_class}")
+
+
+# ----------------- Running the simulation loops ------------------------------------------------------------------
+
+def run_objects(population, ticks, agent_class, seed=None):
+
+	# The simulation loop for agent objects, without the animation.
+	rng = seeding.generator(seed)
+	hospital = HospitalLimit(hospital_limit, hospital_factor) if agent_class == 'Hospital_Limit_Person' else None
+	for i in range(ticks):
+		mu_factor = 1.0 if hospital is None else hospital.factor_for(agents.status_counts(population))
+
+		agents.infection_sweep(population)
+		for person in population:
+			person.position_update()
+
+		if i % 10 == 0:
+			agents.update_statuses(population, mu_factor, rng)
+
+
+def run_population(population, ticks):
+	for i in range(ticks):
+		population.step()
+
+
+def run(agent_class, engine, N, ticks, seed=None, home_index=False):
+
+	# Builds a population and runs it for the given number of ticks, returning how long the ticks took.
+	# The same seed gives the same population and simulation for both engines, so their timings are comparable.
+	# With home_index, a Population with homes looks for contacts home by home, see Population.index_homes.
+	setup_seed, run_seed = seeding.spawn(seed, 2)
+	population = create(agent_class, N, setup_seed)
+	if engine == 'population':
+		limit = hospital_limit if agent_class == 'Hospital_Limit_Person' else None
+		population = Population.from_agents(population, hospital_limit=limit, seed=run_seed)
+		if home_index and population.has_home.any():
+			population.index_homes()
+		start = time.perf_counter()
+		run_population(population, ticks)
+	else:
+		start = time.perf_counter()
+		run_objects(population, ticks, agent_class, run_seed)
+
+	return time.perf_counter() - start
+
+
+def peak_memory(agent_class, engine, N, ticks, seed=None, home_index=False):
+
+	# The peak memory, in MB, used while building and running a population.
+	# This is a separate run, as tracing memory slows the simulation down.
+	tracemalloc.start()
+	run(agent_class, engine, N, ticks, seed, home_index)
+	peak = tracemalloc.get_traced_memory()[1]
+	tracemalloc.stop()
+
+	return peak / 1e6
+
+
+def benchmark(agent_class, engine, N, ticks, seed=None, home_index=False):
+	seconds = run(agent_class, engine, N, ticks, seed, home_index)
+
+	return {'class': agent_class, 'engine': engine, 'home_index': home_index, 'N': N, 'ticks': ticks, 'seed': seed,
+			'seconds': seconds, 'ticks_per_sec': ticks / seconds, 'agent_updates_per_sec': N*ticks / seconds,
+			'peak_memory_mb': peak_memory(agent_class, engine, N, min(ticks, 5), seed, home_index)}
+
+
+# ----------------- Saving and comparing results -----------------------------------------------------------------
+
+def git_commit():
+
+	# The commit of this repository, wherever the benchmarks are run from.
+	try:
+		return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=os.path.dirname(os.path.abspath(__file__)),
+							  capture_output=True, text=True, check=True).stdout.strip()
+	except (OSError, subprocess.CalledProcessError):
+		return None
+
+
+def engine_name(result):
+	return 'home index' if result.get('home_index') else result['engine']
+
+
+def key(result):
+	return (result['class'], engine_name(result), result['N'])
+
+
+def compare(old, new):
+
+	# Prints how the ticks per second of each benchmark have changed.
+	old_results = {key(result): result for result in old['results']}
+	print(f"\nCompared to commit {old.get('commit')}")
+	for result in new['results']:
+		if key(result) in old_results:
+			ratio = result['ticks_per_sec'] / old_results[key(result)]['ticks_per_sec']
+			print(f"{result['class']:>22} {engine_name(result):>11} {result['N']:>7} {ratio:>8.2f}x")
+
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument('--sizes', type=int, nargs='+', default=SIZES, help='numbers of agents')
+	parser.add_argument('--ticks', type=int, help='ticks for every size, instead of the defaults')
+	parser.add_argument('--classes', nargs='+', default=CLASSES, choices=CLASSES)
+	parser.add_argument('--engines', nargs='+', default=ENGINES, choices=ENGINES)
+	parser.add_argument('--kernels', default=kernels.BACKEND, choices=kernels.BACKENDS,
+						help='which kernels the population engine uses, see kernels.py')
+	parser.add_argument('--home-index', action='store_true',
+						help='also time the HomePerson populations looking for contacts home by home, see Population.index_homes')
+	parser.add_argument('--seed', type=int, default=0, help='the seed for the populations and simulations')
+	parser.add_argument('--out', default='Data/Benchmarks/benchmark.json', help='where to save the results')
+	parser.add_argument('--compare', help='results from an earlier run to compare against')
+	args = parser.parse_args()
+	kernels.use(args.kernels)
+	kernels.warm_up()
+
+	results = []
+	print(f"{'class':>22} {'engine':>11} {'N':>7} {'ticks/s':>10} {'updates/s':>12} {'peak MB':>9}")
+	for agent_class in args.classes:
+		for engine in args.engines:
+			# With --home-index the HomePerson populations are timed both with the grid and with the home index
+			indexing = [False, True] if args.home_index and agent_class == 'HomePerson' and engine == 'population' else [False]
+			for N in args.sizes:
+				ticks = args.ticks or TICKS.get(N, max(10, 50000 // N))
+				for home_index in indexing:
+					result = benchmark(agent_class, engine, N, ticks, args.seed, home_index)
+					results.append(result)
+					print(f"{agent_class:>22} {engine_name(result):>11} {N:>7} {result['ticks_per_sec']:>10.1f} "
+							f"{result['agent_updates_per_sec']:>12.0f} {result['peak_memory_mb']:>9.1f}")
+
+	output = {'commit': git_commit(), 'date': time.strftime('%Y-%m-%d %H:%M:%S'), 'python': platform.python_version(),
+				'numpy': np.__version__, 'kernels': kernels.BACKEND, 'results': results}
+	os.makedirs(os.path.dirname(args.out) or '.', exist_ok=True)
+	with open(args.out, 'w') as f:
+		json.dump(output, f, indent=4)
+
+	if args.compare:
+		with open(args.compare) as f:
+			compare(json.load(f), output)
+
+
+if __name__ == '__main__':
+	main()
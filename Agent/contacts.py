@@ -0,0 +1,123 @@
+'''
+Array based contact detection, used by the vectorised Population engine in population.py.
+This is the same idea as the SpatialHash class in agents.py, but instead of a dictionary of cells
+the agents are sorted by cell, and the agents in neighbouring cells are looked up with np.searchsorted,
+so that no Python level loop over the agents is needed.
+
+For populations where most agents stay within a home, home_contact_pairs instead only compares agents whose homes
+are close enough for them to meet, along with any agents without a home, who are compared against everyone.
+'''
+import numpy as np
+
+
+def cell_coordinates(positions, origin, cell_size):
+
+	# The grid cell of each position, shifted by one so that the neighbouring cells are never negative.
+	return np.floor((positions - origin) / cell_size).astype(np.int64) + 1
+
+
+def blocks(start, counts):
+
+	# The indices start[k], start[k] + 1, ..., start[k] + counts[k] - 1 for every k, one after the other.
+	return np.repeat(start, counts) + np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+
+
+def distance_filter(source, target, source_index, target_index, cutoff):
+
+	# Keeps only the candidate pairs that are closer than cutoff.
+	difference = source[source_index] - target[target_index]
+	close = np.einsum('ij,ij->i', difference, difference) < cutoff*cutoff
+	return source_index[close], target_index[close]
+
+
+def contact_pairs(source, target, cutoff):
+
+	# Finds every pair (i, j) where source[i] and target[j] are closer than cutoff.
+	# Returns two index arrays, the first into source and the second into target.
+	empty = np.zeros(0, dtype=np.int64)
+	if len(source) == 0 or len(target) == 0:
+		return empty, empty
+
+	origin = np.minimum(source.min(axis=0), target.min(axis=0))
+	source_cells = cell_coordinates(source, origin, cutoff)
+	target_cells = cell_coordinates(target, origin, cutoff)
+	rows = max(source_cells[:, 1].max(), target_cells[:, 1].max()) + 2
+
+	# The target agents are sorted by cell, so that the agents in any one cell are a contiguous block
+	target_keys = target_cells[:, 0]*rows + target_cells[:, 1]
+	order = np.argsort(target_keys, kind='stable')
+	sorted_keys = target_keys[order]
+
+	source_index = []
+	target_index = []
+	for dx in (-1, 0, 1):
+		for dy in (-1, 0, 1):
+			keys = (source_cells[:, 0] + dx)*rows + (source_cells[:, 1] + dy)
+			start = np.searchsorted(sorted_keys, keys, side='left')
+			stop = np.searchsorted(sorted_keys, keys, side='right')
+			counts = stop - start
+			if counts.sum() == 0:
+				continue
+
+			# Expand each [start, stop) block into one entry per candidate pair
+			source_index.append(np.repeat(np.arange(len(source)), counts))
+			target_index.append(order[blocks(start, counts)])
+
+	if not source_index:
+		return empty, empty
+
+	return distance_filter(source, target, np.concatenate(source_index), np.concatenate(target_index), cutoff)
+
+
+class HomeIndex:
+
+	'''
+	Which homes are close enough for the agents in them to come into contact.
+	home_of gives the home number of each agent, or -1 for agents without a home, and centres and reach the centre
+	of each home and how far from it its agents can go. Two homes are neighbours if their agents can be within cutoff
+	of each other, and every home is a neighbour of itself. The neighbours of home h are neighbours[first[h]:first[h + 1]].
+	'''
+
+	def __init__(self, home_of, centres, reach, cutoff):
+		self.home_of = np.asarray(home_of, dtype=np.int64)
+		self.homes = len(centres)
+
+		a, b = contact_pairs(centres, centres, 2*np.max(reach, initial=0) + cutoff)
+		difference = centres[a] - centres[b]
+		keep = np.hypot(difference[:, 0], difference[:, 1]) < reach[a] + reach[b] + cutoff
+		a, b = a[keep], b[keep]
+
+		order = np.lexsort((b, a))
+		self.neighbours = b[order]
+		self.first = np.concatenate([[0], np.cumsum(np.bincount(a, minlength=self.homes))])
+
+
+def home_contact_pairs(source, target, cutoff, index, source_agents, target_agents):
+
+	# The same as contact_pairs, for agents in homes. source_agents and target_agents are the numbers of the
+	# source and target agents in the HomeIndex, so their homes can be looked up. Agents in a home are only compared
+	# against the agents in neighbouring homes, and agents without a home against everyone, using contact_pairs.
+	source_home, target_home = index.home_of[source_agents], index.home_of[target_agents]
+	roaming_source, roaming_target = np.flatnonzero(source_home < 0), np.flatnonzero(target_home < 0)
+	housed_source, housed_target = np.flatnonzero(source_home >= 0), np.flatnonzero(target_home >= 0)
+
+	# The housed targets sorted by home, with the ones in home h at by_home[in_home[h]:in_home[h + 1]]
+	by_home = housed_target[np.argsort(target_home[housed_target], kind='stable')]
+	in_home = np.concatenate([[0], np.cumsum(np.bincount(target_home[housed_target], minlength=index.homes))])
+
+	# Every housed source with every neighbouring home, then with every target in that home
+	homes = source_home[housed_source]
+	counts = index.first[homes + 1] - index.first[homes]
+	pair_source = np.repeat(housed_source, counts)
+	pair_home = index.neighbours[blocks(index.first[homes], counts)]
+
+	counts = in_home[pair_home + 1] - in_home[pair_home]
+	pairs = distance_filter(source, target, np.repeat(pair_source, counts), by_home[blocks(in_home[pair_home], counts)], cutoff)
+	source_index, target_index = [pairs[0]], [pairs[1]]
+
+	for sources, targets in [(roaming_source, np.arange(len(target))), (housed_source, roaming_target)]:
+		a, b = contact_pairs(source[sources], target[targets], cutoff)
+		source_index.append(sources[a])
+		target_index.append(targets[b])
+
+	return np.concatenate(source_index), np.concatenate(target_index)
@@ -0,0 +1,156 @@
+'''
+Hospitals for the models with death, which change the death rate of the agents depending on how full they are.
+A hospital works out, once per time step, a factor for the death rate of each agent from the number of agents
+with each status, and this is applied to all the agents at once when their statuses are updated.
+It is passed to a Population as its hospital, see population.py.
+
+There are two kinds of hospital:
+	HospitalLimit   -> the original rule, the death rate of every agent is multiplied by factor
+					   whenever there are more than limit Infectious agents, like the Hospital_Limit_Person
+	Hospital        -> a number of beds, which the patients (by default the Infectious and Quarantined agents)
+					   are given in the order they fell ill. Patients in a bed have their normal death rate,
+					   rising by up to strain times as the beds fill up, while those still waiting for a bed
+					   have their death rate multiplied by queue_factor
+
+The HospitalLimit only needs the counts, so it can also be used with the agent classes in agents.py,
+by passing factor_for(agents.status_counts(population)) to update_statuses.
+'''
+import numpy as np
+from status import Status
+
+
+class HospitalLimit:
+
+	'''
+	The hospitals are overwhelmed whenever there are more than limit Infectious agents,
+	and then the death rate of every agent is multiplied by factor.
+	'''
+
+	SETTINGS = ['limit', 'factor']
+	ARRAYS = []
+
+	def __init__(self, limit, factor):
+		self.limit = limit
+		self.factor = factor
+
+
+	def for_population(self, N):
+
+	# The hospital for a new population of N agents. This one keeps nothing about the agents, so it can be shared.
+		return self
+
+
+	def overwhelmed(self, counts):
+
+	# Whether there are more Infectious agents than the hospitals can deal with, given the number with each status.
+		return counts[Status.I] > self.limit
+
+
+	def factor_for(self, counts):
+
+	# What the death rate is multiplied by, given the number of agents with each status.
+		return self.factor if self.overwhelmed(counts) else 1.0
+
+
+	def mu_factor(self, population):
+
+	# What the death rate is multiplied by this time step.
+		return self.factor_for(population.counts())
+
+
+class Hospital:
+
+	'''
+	A hospital with a number of beds. Each time step the patients who have recovered or died leave their beds,
+	and the free beds go to the patients who have been waiting the longest, the rest stay in the queue.
+	The death rate of the patients in a bed is multiplied by 1 + strain*occupancy, where occupancy is
+	the fraction of the beds in use, and that of the patients in the queue by queue_factor.
+	patients are the statuses of the agents who need a bed.
+	'''
+
+	SETTINGS = ['beds', 'queue_factor', 'strain', 'patients', 'occupied', 'queue']
+	ARRAYS = ['in_bed', 'since']
+
+	def __init__(self, beds, queue_factor, strain=0.0, patients=(Status.I, Status.Q)):
+		self.beds = beds
+		self.queue_factor = queue_factor
+		self.strain = strain
+		self.patients = [int(status) for status in patients]
+
+		self.occupied = 0 # The number of beds in use
+		self.queue = 0 # The number of patients waiting for a bed
+		self.in_bed = np.zeros(0, dtype=bool) # Whether each agent has a bed
+		self.since = np.zeros(0, dtype=np.int64) # The time step each patient fell ill, -1 for agents who aren't patients
+
+
+	def for_population(self, N):
+
+	# A copy of this hospital with all its beds empty, for a new population of N agents.
+		hospital = Hospital(self.beds, self.queue_factor, self.strain, self.patients)
+		hospital.in_bed = np.zeros(N, dtype=bool)
+		hospital.since = np.full(N, -1, dtype=np.int64)
+		return hospital
+
+
+	def overwhelmed(self, counts):
+
+	# Whether there are more patients than beds, given the number of agents with each status.
+		return counts[self.patients].sum() > self.beds
+
+
+	def admit(self, population):
+
+	# Lets out the agents who are no longer patients, and gives the free beds to the patients who have waited longest.
+		patient = np.zeros(population.N, dtype=bool)
+		for status in self.patients:
+			patient[population.with_status(status)] = True
+
+		self.in_bed &= patient
+		self.since[~patient] = -1
+		self.since[patient & (self.since < 0)] = population.tick
+
+		waiting = np.flatnonzero(patient & ~self.in_bed)
+		free = max(self.beds - np.count_nonzero(self.in_bed), 0)
+		self.in_bed[waiting[np.argsort(self.since[waiting], kind='stable')[:free]]] = True
+
+		self.occupied = int(np.count_nonzero(self.in_bed))
+		self.queue = max(len(waiting) - free, 0)
+
+
+	def mu_factor(self, population):
+
+	# What the death rate of each agent is multiplied by this time step.
+	# Agents who aren't patients keep their normal death rate.
+		self.admit(population)
+		if self.occupied == 0 and self.queue == 0:
+			return 1.0
+
+		factor = np.ones(population.N)
+		factor[self.since >= 0] = self.queue_factor
+		if self.occupied:
+			factor[self.in_bed] = 1 + self.strain*self.occupied/self.beds
+		return factor
+
+
+# The kinds of hospital, by name, so they can be saved with a Population
+MODELS = {model.__name__: model for model in [HospitalLimit, Hospital]}
+
+
+def hospital_state(hospital):
+
+	# The settings of a hospital, which can be saved as JSON, and its arrays.
+	settings = {name: getattr(hospital, name) for name in hospital.SETTINGS}
+	settings['model'] = type(hospital).__name__
+	return settings, {'hospital_' + name: getattr(hospital, name) for name in hospital.ARRAYS}
+
+
+def restore_hospital(settings, arrays):
+
+	# The hospital saved with hospital_state. The arrays it used are taken out of arrays.
+	model = MODELS[settings['model']]
+	hospital = model.__new__(model)
+	for name in model.SETTINGS:
+		setattr(hospital, name, settings[name])
+	for name in model.ARRAYS:
+		setattr(hospital, name, arrays.pop('hospital_' + name))
+	return hospital
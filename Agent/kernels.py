@@ -0,0 +1,172 @@
+'''
+The inner loops of the Population engine in population.py: moving the agents, and counting how many
+Infectious agents each Susceptible agent is in contact with.
+There are two versions of each. The NumPy versions work on whole arrays at once, but for a few hundred agents
+the time is mostly spent in the overhead of calling lots of small NumPy functions. If numba is installed
+(pip install numba), the same loops are instead compiled to machine code with @njit, which is a lot quicker.
+Both versions do exactly the same arithmetic in the same order, so they give the same trajectories for the same seed.
+
+The compiled versions are used whenever numba can be imported. use('numpy') switches back to the NumPy versions,
+eg. to compare the two.
+'''
+import math
+import numpy as np
+from contacts import cell_coordinates, contact_pairs
+
+try:
+	from numba import njit
+except ImportError:
+	njit = None
+
+BACKENDS = ['numpy', 'numba'] if njit is not None else ['numpy']
+
+
+# ----------------- NumPy versions ---------------------------------------------------------------------------------
+
+def move_numpy(position, velocity, radius, width, height, home, home_size):
+
+	# Keeps the agents moving and inside the environment, and inside their homes if they have one.
+	x, y = position[:, 0], position[:, 1]
+	velocity[(x + radius > width) | (x - radius < 0), 0] *= -1
+	velocity[(y + radius > height) | (y - radius < 0), 1] *= -1
+
+	has_home = home_size > 0
+	if has_home.any():
+		normal = position - home
+		outside = has_home & (np.hypot(normal[:, 0], normal[:, 1]) > home_size - radius)
+
+		# Reflect the velocity in the boundary of the home
+		normal = normal[outside]
+		outside_velocity = velocity[outside]
+		u = (np.einsum('ij,ij->i', outside_velocity, normal) / np.einsum('ij,ij->i', normal, normal))[:, None]*normal
+		velocity[outside] = outside_velocity - 2*u
+
+	position += velocity
+
+
+def contact_counts_numpy(source, target, cutoff, labels=None, groups=1):
+
+	# The number of target positions closer than cutoff to each source position.
+	# The search goes from whichever of the two is smaller, so when there are only a few Infectious agents
+	# the work done grows with the number of Infectious agents, rather than with the number of Susceptible ones.
+	# If labels gives a group, 0 to groups - 1, for each target position, the contacts with each group are
+	# counted separately, giving an array of shape (len(source), groups).
+	if len(target) < len(source):
+		target_pairs, source_pairs = contact_pairs(target, source, cutoff)
+	else:
+		source_pairs, target_pairs = contact_pairs(source, target, cutoff)
+
+	if labels is None:
+		return np.bincount(source_pairs, minlength=len(source))
+	return np.bincount(source_pairs*groups + labels[target_pairs], minlength=len(source)*groups).reshape(len(source), groups)
+
+
+# ----------------- Compiled versions -------------------------------------------------------------------------------
+
+def move_loop(position, velocity, radius, width, height, home, home_size):
+
+	# The same as move_numpy, one agent at a time.
+	for i in range(len(position)):
+		x, y = position[i, 0], position[i, 1]
+		if x + radius > width or x - radius < 0:
+			velocity[i, 0] = -velocity[i, 0]
+		if y + radius > height or y - radius < 0:
+			velocity[i, 1] = -velocity[i, 1]
+
+		if home_size[i] > 0:
+			nx, ny = x - home[i, 0], y - home[i, 1]
+			if math.hypot(nx, ny) > home_size[i] - radius:
+				c = (velocity[i, 0]*nx + velocity[i, 1]*ny) / (nx*nx + ny*ny)
+				velocity[i, 0] = velocity[i, 0] - 2*(c*nx)
+				velocity[i, 1] = velocity[i, 1] - 2*(c*ny)
+
+		position[i, 0] += velocity[i, 0]
+		position[i, 1] += velocity[i, 1]
+
+
+def contact_counts_loop(source, target, cutoff, source_cells, target_cells, count_target, labels, groups):
+
+	# Counts the contacts of each source position, or of each target position if count_target,
+	# using the cells from contacts.cell_coordinates. The loop is over the source positions, with the
+	# target positions bucketed by cell, with the ones in cell k at order[first[k]:first[k + 1]].
+	# The contacts are counted separately by the labels of the other side, one of groups labels.
+	rows = max(source_cells[:, 1].max(), target_cells[:, 1].max()) + 2
+	columns = max(source_cells[:, 0].max(), target_cells[:, 0].max()) + 2
+
+	first = np.zeros(columns*rows + 1, dtype=np.int64)
+	for j in range(len(target)):
+		first[target_cells[j, 0]*rows + target_cells[j, 1] + 1] += 1
+	first = np.cumsum(first)
+
+	order = np.empty(len(target), dtype=np.int64)
+	filled = first[:-1].copy()
+	for j in range(len(target)):
+		key = target_cells[j, 0]*rows + target_cells[j, 1]
+		order[filled[key]] = j
+		filled[key] += 1
+
+	counts = np.zeros((len(target) if count_target else len(source), groups), dtype=np.int64)
+	for i in range(len(source)):
+		for dx in range(-1, 2):
+			for dy in range(-1, 2):
+				key = (source_cells[i, 0] + dx)*rows + source_cells[i, 1] + dy
+				for k in range(first[key], first[key + 1]):
+					j = order[k]
+					ddx = source[i, 0] - target[j, 0]
+					ddy = source[i, 1] - target[j, 1]
+					if ddx*ddx + ddy*ddy < cutoff*cutoff:
+						if count_target:
+							counts[j, labels[i]] += 1
+						else:
+							counts[i, labels[j]] += 1
+
+	return counts
+
+
+if njit is not None:
+	move_loop = njit(cache=True)(move_loop)
+	contact_counts_loop = njit(cache=True)(contact_counts_loop)
+
+
+def contact_counts_compiled(source, target, cutoff, labels=None, groups=1):
+
+	# The same as contact_counts_numpy, looping over whichever of the two is smaller.
+	if len(source) == 0 or len(target) == 0:
+		counts = np.zeros((len(source), groups), dtype=np.int64)
+	else:
+		origin = np.minimum(source.min(axis=0), target.min(axis=0))
+		source_cells, target_cells = cell_coordinates(source, origin, cutoff), cell_coordinates(target, origin, cutoff)
+		target_labels = np.zeros(len(target), dtype=np.int64) if labels is None else labels.astype(np.int64)
+		if len(target) < len(source):
+			counts = contact_counts_loop(target, source, cutoff, target_cells, source_cells, True, target_labels, groups)
+		else:
+			counts = contact_counts_loop(source, target, cutoff, source_cells, target_cells, False, target_labels, groups)
+
+	return counts[:, 0] if labels is None else counts
+
+
+# ----------------- Choosing which versions are used ----------------------------------------------------------------
+
+def use(backend):
+
+	# Switches all the kernels to the 'numpy' or 'numba' versions.
+	global move, contact_counts, BACKEND
+	if backend not in BACKENDS:
+		raise ValueError(f"Unknown or unavailable backend {backend}, the available backends are {BACKENDS}")
+
+	BACKEND = backend
+	if backend == 'numba':
+		move, contact_counts = move_loop, contact_counts_compiled
+	else:
+		move, contact_counts = move_numpy, contact_counts_numpy
+
+
+def warm_up():
+
+	# Runs the kernels once on a couple of agents, so that numba compiles them before anything is timed.
+	position, velocity = np.array([[1.0, 1.0], [2.0, 2.0]]), np.zeros((2, 2))
+	move(position, velocity, 1.0, 10.0, 10.0, position.copy(), np.ones(2))
+	contact_counts(position, position, 1.0)
+
+
+use(BACKENDS[-1])
@@ -0,0 +1,478 @@
+'''
+A vectorised version of the agent based simulations.
+Instead of a list of agent objects, each with their own position, velocity and disease parameters,
+the Population class holds the whole population in a handful of NumPy arrays, one entry per agent.
+Moving, infecting and updating the health status of the agents are then done for all agents at once.
+
+The different agent classes in agents.py are all special cases of a Population:
+	Person                  -> mu = 0, kappa = 0
+	DeathPerson             -> kappa = 0
+	QuarantineDeathPerson   -> mu > 0, kappa > 0
+	Hospital_Limit_Person   -> as above, with a hospital_limit and hospital_factor (a hospital.HospitalLimit)
+	HomePerson              -> home and home_size set for that agent
+A list of agents made with the functions in agents.py can be converted with Population.from_agents.
+
+The one difference from the object based simulations is that every agent is updated at the same time.
+In the object based loop an agent infected early in a time step could already infect others later in that same step.
+
+The number of agents with each status is kept up to date as the agents change status, rather than counted
+every time step, both for the whole population and for groups of agents within it (eg. old and young agents,
+or super spreaders). Every change of status should go through Population.set_status so the counts stay right.
+Each group can have its own beta, gamma, mu and kappa, and how much the groups mix can be given as a contact matrix,
+see create_grouped_population.
+
+Recovery, death and leaving quarantine follow the same table of transitions as the agent classes, see status.py.
+
+The whole state of a Population, including its random number generator, can be saved to a compressed .npz file
+with Population.save and read back with Population.restore, so a long simulation can be checkpointed and
+carried on later exactly as if it had never stopped, see simulate.
+'''
+import json
+import os
+import numpy as np
+import kernels
+from contacts import HomeIndex, home_contact_pairs
+from hospital import HospitalLimit, hospital_state, restore_hospital
+from agents import home_population_layout
+from status import Status, STATUSES, STOP, MOVE, SIR_TRANSITIONS, SIRQD_TRANSITIONS, Transition, new_velocity, transitions_fired
+
+# Health status codes, the code stored for each agent
+S, I, R, D, Q = Status
+
+
+def per_agent(value, N):
+
+	# Turns a single value, or one value per agent, into an array with one entry per agent.
+	return np.broadcast_to(np.asarray(value, dtype=float), (N,)).copy()
+
+
+def per_group(value, group):
+
+	# Looks up the value for each agent from a single value, or one value per group.
+	value = np.asarray(value, dtype=float)
+	return value[group] if value.ndim else value
+
+
+class Population:
+
+	'''
+	A population of N agents stored as arrays.
+	position and velocity have shape (N, 2), status holds the codes S, I, R, D, Q defined above,
+	and beta, gamma, mu, kappa and home_size can be given either as a single value or as one value per agent.
+	Agents with a home_size greater than zero are kept within that distance of their home, like a HomePerson.
+	hospital optionally changes the death rates depending on how full the hospitals are, see hospital.py.
+	Setting hospital_limit instead gives a HospitalLimit, where the death rate is multiplied by hospital_factor
+	whenever there are more than hospital_limit Infectious agents, like the Hospital_Limit_Person.
+	group optionally puts each agent into a numbered group, 0, 1, 2, ..., which is counted separately in group_counts.
+	groups is the number of groups, which only needs giving if some of them might start out empty.
+	contact_matrix optionally scales how infectious the agents in each group are to those in each other group,
+	an Infectious agent in group h infects a Susceptible agent in group g with chance beta*contact_matrix[g, h],
+	which is capped at 1. The entries can't be negative.
+	transitions is the table of status changes made every status_every time steps, see status.py.
+	'''
+
+	def __init__(self, position, velocity, radius, beta, gamma, width, height, status=None, mu=0.0, kappa=0.0,
+				home=None, home_size=0.0, hospital_limit=None, hospital_factor=1.0, status_every=10, group=None, seed=None,
+				transitions=SIRQD_TRANSITIONS, groups=None, hospital=None, contact_matrix=None):
+
+		self.position = np.array(position, dtype=float) # The positions of the agents
+		self.velocity = np.array(velocity, dtype=float) # The velocities of the agents
+		self.N = len(self.position) # The number of agents
+		self.radius = float(radius) # The radius of the agents
+		self.width = width # The width of the environment
+		self.height = height # The height of the environment
+
+		if status is None:
+			self.status = np.full(self.N, S, dtype=np.int8)
+		else:
+			self.status = np.array(status, dtype=np.int8)
+
+		self.beta = per_agent(beta, self.N) # The infection rates
+		self.gamma = per_agent(gamma, self.N) # The recovery rates
+		self.mu = per_agent(mu, self.N) # The death rates
+		self.kappa = per_agent(kappa, self.N) # The quarantine rates
+
+		self.home_size = per_agent(home_size, self.N) # The size of each agent's home area, zero if it has none
+		self.has_home = self.home_size > 0
+		if home is None:
+			self.home = np.zeros((self.N, 2))
+		else:
+			self.home = np.array(home, dtype=float)
+		self.home_index = None # Set by index_homes
+
+		if hospital is None and hospital_limit is not None:
+			hospital = HospitalLimit(hospital_limit, hospital_factor)
+		self.hospital = None if hospital is None else hospital.for_population(self.N)
+
+		if group is None:
+			self.group = np.zeros(self.N, dtype=np.int32)
+		else:
+			self.group = np.array(group, dtype=np.int32)
+		self.groups = groups or (self.group.max() + 1 if self.N else 1)
+		self.recount()
+
+		if contact_matrix is None:
+			self.contact_matrix = None
+		else:
+			self.contact_matrix = np.array(contact_matrix, dtype=float).reshape(self.groups, self.groups)
+			if (self.contact_matrix < 0).any():
+				raise ValueError("The entries of the contact matrix can't be negative")
+
+		self.transitions = transitions
+		self.status_every = status_every # Statuses are only updated every status_every time steps
+		self.tick = 0
+		self.rng = np.random.default_rng(seed)
+
+
+	@classmethod
+	def from_agents(cls, population, hospital_limit=None, group=None, seed=None):
+
+	# Builds a Population from a list of agents made with the classes in agents.py.
+	# The transitions are those of the agent class with the most of them, as the tables build on each other.
+		first = population[0]
+		return cls(position=[person.position for person in population],
+					velocity=[person.velocity for person in population],
+					status=[int(person.status) for person in population],
+					radius=max(person.radius for person in population),
+					beta=[person.beta for person in population],
+					gamma=[person.gamma for person in population],
+					mu=[getattr(person, 'mu', 0.0) for person in population],
+					kappa=[getattr(person, 'kappa', 0.0) for person in population],
+					home=[getattr(person, 'home', (0.0, 0.0)) for person in population],
+					home_size=[getattr(person, 'home_size', 0.0) for person in population],
+					width=first.width, height=first.height,
+					hospital_limit=hospital_limit, hospital_factor=getattr(first, 'hospital_factor', 1.0),
+					group=group, seed=seed, transitions=max((person.transitions for person in population), key=len))
+
+
+	def recount(self):
+
+	# Counts the agents with each status in each group from scratch, group_counts[group, status].
+		self.members = {}
+		self.group_counts = np.bincount(self.group*len(STATUSES) + self.status,
+										minlength=self.groups*len(STATUSES)).reshape(self.groups, len(STATUSES))
+
+
+	def with_status(self, status):
+
+	# The indices of the agents with a status. These are kept until one of those agents changes status,
+	# so that time steps where nobody's status changes don't have to look through the whole population again.
+		if status not in self.members:
+			self.members[status] = np.flatnonzero(self.status == status)
+		return self.members[status]
+
+
+	def counts(self):
+
+	# The number of agents with each status, in the order of STATUSES.
+		return self.group_counts.sum(axis=0)
+
+
+	def set_status(self, index, status):
+
+	# Changes the status of the agents at index, and updates the counts to match.
+		counts = self.group_counts.reshape(-1)
+		np.subtract.at(counts, self.group[index]*len(STATUSES) + self.status[index], 1)
+		np.add.at(counts, self.group[index]*len(STATUSES) + status, 1)
+
+		if len(index):
+			for changed in np.unique(np.append(self.status[index], status)):
+				self.members.pop(changed, None)
+		self.status[index] = status
+
+
+	def index_homes(self):
+
+	# Makes infect only compare agents with homes against the agents in their own and nearby homes,
+	# and the agents without a home, see contacts.HomeIndex. This pays off when homes are small and far apart,
+	# but for crowded homes the uniform grid used otherwise is quicker.
+		home_of = np.full(self.N, -1)
+		centres, home_of[self.has_home] = np.unique(self.home[self.has_home], axis=0, return_inverse=True)
+
+		reach = np.zeros(len(centres))
+		np.maximum.at(reach, home_of[self.has_home], self.home_size[self.has_home])
+		self.home_index = HomeIndex(home_of, centres, reach, 1.5*self.radius)
+
+
+	def contact_counts(self, susceptible, infectious, by_group=False):
+
+	# The number of the agents at infectious within 1.5*radius of each of the agents at susceptible, or if by_group,
+	# the number in each group, with shape (len(susceptible), groups).
+	# The search goes from the Infectious agents when there are fewer of them, see kernels.contact_counts.
+		labels, groups = (self.group[infectious], self.groups) if by_group else (None, 1)
+		if self.home_index is None:
+			return kernels.contact_counts(self.position[susceptible], self.position[infectious], 1.5*self.radius, labels, groups)
+
+		pairs, other = home_contact_pairs(self.position[susceptible], self.position[infectious], 1.5*self.radius,
+											self.home_index, susceptible, infectious)
+		if labels is None:
+			return np.bincount(pairs, minlength=len(susceptible))
+		return np.bincount(pairs*groups + labels[other], minlength=len(susceptible)*groups).reshape(len(susceptible), groups)
+
+
+	def infect(self):
+
+	# Every Susceptible agent within 1.5*radius of an Infectious agent has a chance beta of being infected by it.
+	# Being near k Infectious agents gives a chance of 1 - (1 - beta)^k, as in the object based loop.
+	# With a contact matrix, the contacts with each group of Infectious agents are counted separately, all in one search,
+	# and k contacts with group h give an agent in group g a chance of 1 - (1 - beta*contact_matrix[g, h])^k,
+	# with the chance for each contact capped at 1.
+	# The search for contacts is only done when there are both Susceptible and Infectious agents.
+		counts = self.counts()
+		if counts[S] == 0 or counts[I] == 0:
+			return
+
+		susceptible = self.with_status(S)
+		infectious = self.with_status(I)
+
+		if self.contact_matrix is None:
+			contacts = self.contact_counts(susceptible, infectious)
+			if not contacts.any():
+				return
+
+			exposed = susceptible[contacts > 0]
+			chance = 1 - (1 - self.beta[exposed])**contacts[contacts > 0]
+		else:
+			contacts = self.contact_counts(susceptible, infectious, by_group=True)
+			near = contacts.any(axis=1)
+			if not near.any():
+				return
+
+			# The chance of not being infected by each group, multiplied together
+			exposed = susceptible[near]
+			per_contact = np.minimum(self.beta[exposed, None]*self.contact_matrix[self.group[exposed]], 1)
+			escape = (1 - per_contact)**contacts[near]
+			chance = 1 - escape.prod(axis=1)
+
+		# A newly infected agent goes into quarantine with chance kappa, and stops moving.
+		# One random number per agent decides both, the bottom kappa of the chance of infection being quarantine.
+		draws = self.rng.random(len(exposed))
+		infected = draws < chance
+		quarantined = draws < chance*self.kappa[exposed]
+
+		self.set_status(exposed[infected], np.where(quarantined[infected], Q, I))
+		self.velocity[exposed[quarantined]] = 0
+
+
+	def status_update(self, mu_factor=1.0):
+
+	# Makes the transitions happen for all agents at once, eg. Infectious agents recover with chance gamma,
+	# and otherwise die with chance mu. Dead agents stop moving, and agents leaving quarantine start moving again.
+	# mu_factor multiplies the death rates, either one value for everyone or one value per agent.
+	# All the random numbers are drawn at once, one to pick the transition and two for a new velocity per agent.
+		draws = self.rng.random((self.N, 3))
+		rates = {'beta': self.beta, 'gamma': self.gamma, 'mu': self.mu, 'kappa': self.kappa}
+		fired = transitions_fired(self.transitions, self.status, rates, draws[:, 0], {'mu': mu_factor})
+
+		for transition, index in zip(self.transitions, fired):
+			self.set_status(index, transition.target)
+			if transition.effect == STOP:
+				self.velocity[index] = 0
+			elif transition.effect == MOVE:
+				self.velocity[index] = new_velocity(draws[index, 1:])
+
+
+	def position_update(self):
+
+	# Keeps the agents moving and inside the environment, and inside their homes if they have one.
+	# This is done by one of the kernels in kernels.py, compiled if numba is installed.
+		kernels.move(self.position, self.velocity, self.radius, self.width, self.height, self.home, self.home_size)
+
+
+	def absorbed(self):
+
+	# Whether no agent can change status any more, as there is nobody left to infect others, and nobody
+	# with a status any of the transitions start from (eg. no Infectious or Quarantined agents).
+	# From then on the only thing that changes is where the agents are.
+		counts = self.counts()
+		return counts[I] == 0 and not any(counts[transition.source] for transition in self.transitions)
+
+
+	def step(self):
+
+	# Runs one time step of the simulation. Once the population has absorbed, the agents are just moved.
+	# The hospital works out the death rates from the counts at the end of the last time step.
+		if self.absorbed():
+			self.position_update()
+			self.tick += 1
+			return
+
+		mu_factor = 1.0 if self.hospital is None else self.hospital.mu_factor(self)
+
+		self.infect()
+		if self.tick % self.status_every == 0:
+			self.status_update(mu_factor)
+		self.position_update()
+
+		self.tick += 1
+
+
+	# The arrays saved in a checkpoint
+	ARRAYS = ['position', 'velocity', 'status', 'beta', 'gamma', 'mu', 'kappa', 'home', 'home_size', 'group', 'group_counts']
+
+	def save(self, path, **extras):
+
+	# Saves the state of the population to a .npz file, along with any extra arrays, eg. the results so far.
+	# The file is written under another name first and then renamed, so a crash while saving can't corrupt
+	# the last checkpoint.
+		settings = {'width': self.width, 'height': self.height, 'radius': self.radius,
+					'status_every': self.status_every, 'tick': self.tick, 'home_index': self.home_index is not None,
+					'transitions': [[int(t.source), int(t.target), t.rate, t.effect] for t in self.transitions],
+					'contact_matrix': None if self.contact_matrix is None else self.contact_matrix.tolist(),
+					'rng': self.rng.bit_generator.state}
+
+		arrays = {name: getattr(self, name) for name in self.ARRAYS}
+		settings['hospital'] = None
+		if self.hospital is not None:
+			settings['hospital'], hospital_arrays = hospital_state(self.hospital)
+			arrays.update(hospital_arrays)
+		arrays['settings'] = np.array(json.dumps(settings, default=lambda value: value.item()))
+
+		with open(path + '.tmp', 'wb') as f:
+			np.savez_compressed(f, **arrays, **extras)
+		os.replace(path + '.tmp', path)
+
+
+	def restore(self, path):
+
+	# Sets the population to the state saved in path, and returns a dictionary of the extra arrays saved with it.
+		with np.load(path) as checkpoint:
+			arrays = dict(checkpoint)
+
+		settings = json.loads(arrays.pop('settings').item())
+		for name in self.ARRAYS:
+			setattr(self, name, arrays.pop(name))
+
+		self.N = len(self.position)
+		self.members = {}
+		self.groups = len(self.group_counts)
+		self.has_home = self.home_size > 0
+		self.home_index = None
+		for name in ['width', 'height', 'radius', 'status_every', 'tick']:
+			setattr(self, name, settings[name])
+		self.hospital = None if settings.get('hospital') is None else restore_hospital(settings['hospital'], arrays)
+		self.contact_matrix = None if settings.get('contact_matrix') is None else np.array(settings['contact_matrix'])
+		self.transitions = tuple(Transition(Status(source), Status(target), rate, effect)
+									for source, target, rate, effect in settings['transitions'])
+		if settings['home_index']:
+			self.index_homes()
+
+		state = settings['rng']
+		self.rng = np.random.Generator(getattr(np.random, state['bit_generator'])())
+		self.rng.bit_generator.state = state
+
+		return arrays
+
+
+	@classmethod
+	def load(cls, path):
+
+	# A new Population from a checkpoint, along with the extra arrays saved with it.
+		population = cls.__new__(cls)
+		return population, population.restore(path)
+
+
+# ----------------- Functions for initialising and running simulations --------------------------------------------
+
+def create_population(N, init_I, radius, beta, gamma, width, height, mu=0.0, kappa=0.0,
+						hospital_limit=None, hospital_factor=1.0, seed=None, hospital=None):
+
+	# Creates a population of N agents spread uniformly over the environment, init_I of them Infectious.
+	rng = np.random.default_rng(seed)
+
+	position = radius + rng.random((N, 2))*(np.array([width, height]) - 2*radius)
+	velocity = (rng.random((N, 2)) - 0.5)*3
+
+	status = np.full(N, S, dtype=np.int8)
+	status[rng.choice(N, size=min(init_I, N), replace=False)] = I
+
+	return Population(position, velocity, radius, beta, gamma, width, height, status=status, mu=mu, kappa=kappa,
+						hospital_limit=hospital_limit, hospital_factor=hospital_factor, seed=rng, hospital=hospital)
+
+
+def create_grouped_population(sizes, init_I, radius, beta, gamma, width, height, mu=0.0, kappa=0.0,
+								contact_matrix=None, hospital=None, seed=None):
+
+	# Creates a population made up of groups of agents, eg. age bands, with sizes[g] agents in group g,
+	# spread uniformly over the environment, init_I of them Infectious. beta, gamma, mu and kappa can be given
+	# either as a single value or as one value per group, and contact_matrix is as for the Population class.
+	rng = np.random.default_rng(seed)
+	group = np.repeat(np.arange(len(sizes)), sizes)
+	N = len(group)
+
+	position = radius + rng.random((N, 2))*(np.array([width, height]) - 2*radius)
+	velocity = (rng.random((N, 2)) - 0.5)*3
+
+	status = np.full(N, S, dtype=np.int8)
+	status[rng.choice(N, size=min(init_I, N), replace=False)] = I
+
+	return Population(position, velocity, radius, per_group(beta, group), per_group(gamma, group), width, height,
+						status=status, mu=per_group(mu, group), kappa=per_group(kappa, group), group=group,
+						groups=len(sizes), contact_matrix=contact_matrix, hospital=hospital, seed=rng)
+
+
+def create_home_population(homes, homes_per_row, people_per_home, home_radius, overlap, super_spreaders, init_I,
+							radius, beta, gamma, width, height, seed=None, home_index=False):
+
+	# The same population as agents.create_home_population, people_per_home agents kept within home_radius of each
+	# of the homes, plus super_spreaders agents free to go anywhere, who are put in group 1 so they are counted separately.
+	# With home_index, contacts are looked for home by home rather than with the grid, see Population.index_homes.
+	rng = np.random.default_rng(seed)
+	position, velocity, home, is_super_spreader = home_population_layout(homes, homes_per_row, people_per_home, home_radius,
+														overlap, super_spreaders, radius, width, height, rng)
+	N = len(position)
+
+	status = np.full(N, S, dtype=np.int8)
+	status[rng.choice(N, size=min(init_I, N), replace=False)] = I
+
+	population = Population(position, velocity, radius, beta, gamma, width, height, status=status, home=home,
+							home_size=np.where(is_super_spreader, 0.0, home_radius), group=is_super_spreader,
+							transitions=SIR_TRANSITIONS, groups=2, seed=rng)
+	if home_index:
+		population.index_homes()
+	return population
+
+
+def simulate(population, T, record=Population.counts, checkpoint=None, checkpoint_every=1000, stop_early=True, move=False):
+
+	# Runs a population for T time steps, and returns what record gives at each step.
+	# By default this is the number of agents with each status.
+	# If checkpoint is a path, the population and the results so far are saved there every checkpoint_every
+	# time steps and at the end. If the file is already there, the run carries on from where it was saved.
+	# With stop_early, once the population has absorbed (see Population.absorbed) the rest of the results are
+	# filled in with the final row rather than simulated, as the statuses can't change any more. This is only
+	# right if record doesn't depend on where the agents are. If move is set, the agents are still moved
+	# to where they would be at the end, otherwise they are left where they were when the run stopped.
+	series = None
+	start = 0
+
+	if checkpoint is not None and os.path.exists(checkpoint):
+		saved = population.restore(checkpoint)
+		series, start = saved['series'], int(saved['done'])
+
+	for i in range(start, T):
+		if stop_early and population.absorbed():
+			row = record(population)
+			if series is None:
+				series = np.zeros((T, len(row)), dtype=np.int64)
+			series[i:] = row
+
+			for j in range(i, T):
+				if move:
+					population.position_update()
+				population.tick += 1
+
+			if checkpoint is not None:
+				population.save(checkpoint, series=series, done=T)
+			break
+
+		population.step()
+		row = record(population)
+		if series is None:
+			series = np.zeros((T, len(row)), dtype=np.int64)
+		series[i] = row
+
+		if checkpoint is not None and ((i + 1) % checkpoint_every == 0 or i + 1 == T):
+			population.save(checkpoint, series=series, done=i + 1)
+
+	return series
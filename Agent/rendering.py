@@ -0,0 +1,225 @@
+'''
+The pygame front end for the animations, kept separate from the simulations themselves,
+so that simulations run without animation never need to import pygame.
+While a simulation runs, a SnapshotBuffer keeps a copy of the agents' positions and statuses every few time steps.
+A Viewer then plays these snapshots back in a pygame window. As the simulation only copies a couple of arrays
+every few time steps, the drawing never slows the simulation down.
+The agents are drawn straight from the position and status arrays, using one pre-drawn translucent circle per status
+and a single Surface.blits call, rather than making a new transparent surface for every agent in every frame.
+A Recorder instead saves the animation to a file, without needing a display, see ExportAnimation.py.
+'''
+from collections import namedtuple
+import os
+import queue
+import shutil
+import subprocess
+import sys
+import threading
+import pygame
+from agents import STATUS_COLORS
+
+WHITE = (255, 255, 255)
+BLACK = (0, 0, 0)
+
+
+def draw_circle_alpha(surface, color, center, radius):
+
+	# Special function so that the circles representing the agents can have transparency.
+
+    target_rect = pygame.Rect(center, (0, 0)).inflate((radius * 2, radius * 2))
+    shape_surf = pygame.Surface(target_rect.size, pygame.SRCALPHA)
+    pygame.draw.circle(shape_surf, color, (radius, radius), radius)
+    surface.blit(shape_surf, target_rect)
+
+
+def make_sprites(radius, colors=STATUS_COLORS):
+
+	# One translucent circle for each colour, drawn once so that it can be reused for every agent.
+	sprites = []
+	for color in colors:
+		sprite = pygame.Surface((int(2*radius), int(2*radius)), pygame.SRCALPHA)
+		pygame.draw.circle(sprite, color, (radius, radius), radius)
+		sprites.append(sprite)
+	return sprites
+
+
+def draw_agents(surface, sprites, position, status, radius):
+
+	# Draws all the agents at once, with a single call to Surface.blits.
+	topleft = (position - radius).tolist()
+	surface.blits(list(zip(map(sprites.__getitem__, status.tolist()), topleft)), doreturn=False)
+
+
+def render(surface, sprites, snapshot, radius, extras=None):
+
+	# Draws a whole frame: the background, the agents, and anything extra.
+	surface.fill(WHITE)
+	draw_agents(surface, sprites, snapshot.position, snapshot.status, radius)
+	if extras is not None:
+		extras(surface, snapshot)
+
+
+# A copy of the state of the agents at one time step
+Snapshot = namedtuple('Snapshot', ['tick', 'position', 'status'])
+
+
+class SnapshotBuffer:
+
+	'''
+	Keeps a Snapshot of a Population every `every` time steps, to be drawn by a Viewer.
+	'''
+
+	def __init__(self, every=1):
+		self.every = every
+		self.snapshots = []
+
+	def record(self, population):
+		if population.tick % self.every == 0:
+			self.snapshots.append(Snapshot(population.tick, population.position.copy(), population.status.copy()))
+
+	def __iter__(self):
+		return iter(self.snapshots)
+
+	def __len__(self):
+		return len(self.snapshots)
+
+
+class Viewer:
+
+	'''
+	A pygame window that draws snapshots of a simulation.
+	extras, if given, is called with the screen and the snapshot after the agents are drawn,
+	for anything else a script wants to draw, such as the homes or some text.
+	'''
+
+	def __init__(self, width, height, radius, fps=60, extras=None):
+		self.radius = radius
+		self.fps = fps
+		self.extras = extras
+		self.screen = pygame.display.set_mode((int(width), int(height)))
+		self.clock = pygame.time.Clock()
+		self.sprites = make_sprites(radius)
+
+	def draw(self, snapshot):
+
+	# Draws a single snapshot to the screen.
+		render(self.screen, self.sprites, snapshot, self.radius, self.extras)
+		pygame.display.update()
+
+	def play(self, snapshots):
+
+	# Draws the snapshots one after the other, at most fps a second, until they run out or the window is closed.
+		for snapshot in snapshots:
+			for event in pygame.event.get():
+				if event.type == pygame.QUIT:
+					sys.exit()
+
+			self.draw(snapshot)
+			self.clock.tick(self.fps)
+
+
+class Recorder:
+
+	'''
+	Records an animation of a simulation to a file, without a display.
+	path can be a folder, which a numbered png image is saved into for every frame,
+	a .gif file, which the frames are added to one at a time using Pillow, each with its own palette,
+	or a .mp4 file, which the frames are streamed into using ffmpeg, if it is installed.
+	Snapshots are taken every `every` time steps, and the drawing and saving is done in a background thread,
+	so that the simulation can carry on while the frames are written.
+	'''
+
+	def __init__(self, path, width, height, radius, every=1, fps=30, extras=None):
+		os.environ.setdefault('SDL_VIDEODRIVER', 'dummy') # No window is ever opened
+
+		self.path = path
+		self.size = (int(width), int(height))
+		self.radius = radius
+		self.every = every
+		self.fps = fps
+		self.extras = extras
+		self.frames = 0
+		self.error = None # Anything that went wrong while drawing or saving the frames
+		self.gif = open(path, 'wb') if path.endswith('.gif') else None
+
+		self.ffmpeg = None
+		if path.endswith('.mp4'):
+			if shutil.which('ffmpeg') is None:
+				raise RuntimeError("ffmpeg is needed to record .mp4 files, save to a .gif or a folder instead")
+			self.ffmpeg = subprocess.Popen(['ffmpeg', '-y', '-loglevel', 'error', '-f', 'rawvideo', '-pix_fmt', 'rgb24',
+											'-s', f'{self.size[0]}x{self.size[1]}', '-r', str(fps), '-i', '-',
+											'-pix_fmt', 'yuv420p', path], stdin=subprocess.PIPE)
+		elif not path.endswith('.gif'):
+			os.makedirs(path, exist_ok=True)
+
+		# The snapshots waiting to be drawn, limited so that memory can't grow without bound
+		self.queue = queue.Queue(maxsize=100)
+		self.thread = threading.Thread(target=self.write_frames, daemon=True)
+		self.thread.start()
+
+	def record(self, population):
+
+	# Called by the simulation after each time step.
+		if population.tick % self.every == 0:
+			self.check()
+			self.queue.put(Snapshot(population.tick, population.position.copy(), population.status.copy()))
+
+	def write_frames(self):
+
+	# Runs in the background thread, drawing and saving each snapshot as it arrives.
+	# If anything goes wrong, eg. the disk fills up or ffmpeg stops, the error is kept to be raised by record or close,
+	# and the snapshots are still taken off the queue, so that neither of them waits forever for space in it.
+		try:
+			surface = pygame.Surface(self.size)
+			sprites = make_sprites(self.radius)
+
+			while True:
+				snapshot = self.queue.get()
+				if snapshot is None:
+					return
+				render(surface, sprites, snapshot, self.radius, self.extras)
+				self.save(surface)
+				self.frames += 1
+		except Exception as error:
+			self.error = error
+
+		while self.queue.get() is not None:
+			pass
+
+	def check(self):
+
+	# Raises the error from the background thread, if there was one.
+		if self.error is not None:
+			raise RuntimeError(f'Could not save the animation to {self.path}') from self.error
+
+	def save(self, surface):
+		if self.ffmpeg is not None:
+			self.ffmpeg.stdin.write(pygame.image.tostring(surface, 'RGB'))
+		elif self.gif is not None:
+			from PIL import Image, GifImagePlugin
+			image = Image.frombytes('RGB', self.size, pygame.image.tostring(surface, 'RGB')).convert('P', palette=Image.ADAPTIVE)
+			if self.frames == 0:
+				header, _ = GifImagePlugin.getheader(image, info={'loop': 0})
+				self.gif.writelines(header)
+			self.gif.writelines(GifImagePlugin.getdata(image, duration=int(1000/self.fps), include_color_table=True))
+		else:
+			pygame.image.save(surface, os.path.join(self.path, f'frame_{self.frames:06d}.png'))
+
+	def close(self):
+
+	# Waits for the remaining frames to be written, and finishes the file.
+		self.queue.put(None)
+		self.thread.join()
+
+		if self.ffmpeg is not None:
+			try:
+				self.ffmpeg.stdin.close()
+			except BrokenPipeError as error: # ffmpeg has already stopped
+				self.error = self.error or error
+			self.ffmpeg.wait()
+		elif self.gif is not None:
+			if self.error is None:
+				self.gif.write(b';') # The end of the gif
+			self.gif.close()
+
+		self.check()
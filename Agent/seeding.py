@@ -0,0 +1,52 @@
+'''
+Random seeds for the simulations, so that any run can be repeated exactly.
+Everything is seeded from a single master seed using NumPy's SeedSequence. A master seed can be split into
+any number of independent child seeds with spawn, eg. one for each repeat of a simulation, or one for setting up
+the agents and one for running them. The child seeds are the same every time for the same master seed,
+and their random number streams don't overlap, so repeats run in different processes are still independent.
+
+The vectorised Population class uses NumPy Generators, while the agent classes in agents.py use the
+standard library's random.Random, which is much quicker at drawing one number at a time.
+Both can be made from the same seeds.
+'''
+import random
+import numpy as np
+
+
+def sequence(seed=None):
+
+	# The SeedSequence for a seed, which can be an integer, a SeedSequence already, or None for a random one.
+	if isinstance(seed, np.random.SeedSequence):
+		return seed
+	return np.random.SeedSequence(seed)
+
+
+def spawn(seed, n):
+
+	# n independent child seeds of a master seed.
+	return sequence(seed).spawn(n)
+
+
+def entropy(seed=None):
+
+	# The integer a master seed comes from, so that it can be recorded along with the results,
+	# even when no seed was given and a random one was used.
+	return sequence(seed).entropy
+
+
+def generator(seed=None):
+
+	# A NumPy Generator from a seed, SeedSequence, or a Generator already.
+	return np.random.default_rng(seed)
+
+
+def stdlib_random(seed=None):
+
+	# A random.Random for the agent classes, from a seed, SeedSequence, NumPy Generator, or a random.Random already.
+	if isinstance(seed, random.Random):
+		return seed
+	if isinstance(seed, np.random.Generator):
+		return random.Random(int(seed.integers(2**63)))
+
+	state = sequence(seed).generate_state(4, dtype=np.uint64)
+	return random.Random(int.from_bytes(state.tobytes(), 'little'))
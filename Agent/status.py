@@ -0,0 +1,91 @@
+'''
+The health statuses of the agents, and the rules for how agents move between them.
+Statuses are stored as small integers, the Status codes below, rather than as the letters 'S', 'I', 'R', 'D', 'Q'.
+
+Apart from infection, which depends on contact between agents, every change of status is a Transition:
+an agent with status source moves to status target with a chance given by one of its rates (eg. 'gamma'),
+after which an effect may be applied to it, STOP to stop it moving or MOVE to start it moving again.
+Each model is a table of these transitions. They are tried in the order of the table, and an agent can only
+make one of them in a time step, so for an Infectious agent recovery is tried before death.
+The same tables are used by both the agent classes in agents.py and the Population class in population.py.
+
+Each agent only needs one random number per time step to decide which, if any, of its transitions happens.
+The number is compared against consecutive intervals, one for each transition from the agent's status,
+with the length of each interval being the chance that transition happens given the ones before it didn't.
+This has the same chances as drawing a new random number for every transition, but lets the random numbers
+for the whole population be drawn in a single call.
+'''
+from collections import namedtuple
+from enum import IntEnum
+import numpy as np
+
+
+class Status(IntEnum):
+	S = 0 # Susceptible
+	I = 1 # Infectious
+	R = 2 # Recovered
+	D = 3 # Dead
+	Q = 4 # Quarantined
+
+# The letter of each status, in the order of the codes
+STATUSES = ''.join(status.name for status in Status)
+
+
+def as_status(status):
+
+	# The Status for a letter such as 'S', or for a Status or code already.
+	return Status[status] if isinstance(status, str) else Status(status)
+
+
+# The effects a transition can have on an agent's movement
+STOP = 'stop'
+MOVE = 'move'
+
+Transition = namedtuple('Transition', ['source', 'target', 'rate', 'effect'])
+
+SIR_TRANSITIONS = (
+	Transition(Status.I, Status.R, 'gamma', None),
+)
+
+SIRD_TRANSITIONS = SIR_TRANSITIONS + (
+	Transition(Status.I, Status.D, 'mu', STOP),
+)
+
+SIRQD_TRANSITIONS = SIRD_TRANSITIONS + (
+	Transition(Status.Q, Status.R, 'gamma', MOVE),
+	Transition(Status.Q, Status.D, 'mu', STOP),
+)
+
+
+def new_velocity(draws):
+
+	# A random velocity for agents that start moving again, the same as for agents leaving quarantine before,
+	# from two random numbers between 0 and 1 per agent.
+	return (draws - 0.5)*2
+
+
+def transitions_fired(transitions, status, rates, draws, factors=None):
+
+	# Works out which agents change status this time step, for all agents at once.
+	# rates maps the name of each rate to an array with one value per agent, draws holds one random number
+	# between 0 and 1 per agent, and factors optionally maps the name of a rate to a number it is
+	# multiplied by (eg. {'mu': 2} when the hospitals are overwhelmed), or to one number per agent.
+	# Returns a list with, for each transition, the indices of the agents it happens to.
+	factors = factors or {}
+	lower = np.zeros(len(status)) # Where the interval for the next transition of each agent starts
+	remaining = np.ones(len(status)) # The chance that none of the agent's transitions so far have happened
+	fired = []
+
+	for transition in transitions:
+		candidates = np.flatnonzero(status == transition.source)
+		factor = factors.get(transition.rate, 1.0)
+		if np.ndim(factor):
+			factor = factor[candidates]
+		chance = remaining[candidates]*factor*rates[transition.rate][candidates]
+		draw = draws[candidates] - lower[candidates]
+
+		fired.append(candidates[(draw >= 0) & (draw < chance)])
+		lower[candidates] += chance
+		remaining[candidates] -= chance
+
+	return fired
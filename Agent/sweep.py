@@ -0,0 +1,122 @@
+'''
+Parameter sweeps over the agent based models.
+A sweep is a list of parameter points, each a dictionary such as {'beta': 0.05, 'kappa': 0.5},
+made with either grid, which takes every combination of the given values, or latin_hypercube,
+which spreads a given number of points evenly over the given ranges.
+run_sweep then runs every point in parallel, using the vectorised Population engine.
+
+The results of each point are stored in a cache folder, under a name made by hashing the model, parameters,
+number of time steps, number of repeats and seed. Running a sweep again, or a bigger sweep that includes
+points that have already been run, only runs the points that aren't in the cache yet.
+A sweep without a seed is given a random one, which is stored with its results, so its points are never
+mistaken for those of another unseeded sweep.
+'''
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+import hashlib
+import itertools
+import json
+import os
+import numpy as np
+import batch
+from population import STATUSES, Population, create_population
+import seeding
+from trajectories import file_names, save_trajectories, load_trajectories
+
+
+# The default values of the parameters, the same as in the Agent scripts
+DEFAULTS = {'N': 100, 'init_I': 5, 'radius': 15.0, 'width': 800, 'height': 600,
+			'beta': 0.05, 'gamma': 0.015, 'mu': 0.015, 'kappa': 0.5,
+			'hospital_limit': 15, 'hospital_factor': 2}
+
+# The parameters that can be swept for each model
+COMMON = ['N', 'init_I', 'radius', 'width', 'height', 'beta', 'gamma']
+MODELS = {'SIR': COMMON,
+			'SIRD': COMMON + ['mu'],
+			'SIRQD': COMMON + ['mu', 'kappa'],
+			'SIRQD_hospital': COMMON + ['mu', 'kappa', 'hospital_limit', 'hospital_factor']}
+
+
+# ----------------- Making the parameter points ------------------------------------------------------------------
+
+def grid(**axes):
+
+	# Every combination of the given values, eg. grid(beta=[0.05, 0.1], kappa=[0.2, 0.5]) gives four points.
+	names = list(axes)
+	return [dict(zip(names, values)) for values in itertools.product(*axes.values())]
+
+
+def latin_hypercube(n, seed=None, **ranges):
+
+	# n points spread over the given (low, high) ranges, with exactly one point in each nth of every range.
+	# Parameters whose range is given as two integers, such as N, are rounded to integers.
+	rng = np.random.default_rng(seed)
+	points = [{} for _ in range(n)]
+
+	for name, (low, high) in ranges.items():
+		values = low + (rng.permutation(n) + rng.random(n)) / n * (high - low)
+		if isinstance(low, int) and isinstance(high, int):
+			values = np.round(values).astype(int)
+		for point, value in zip(points, values.tolist()):
+			point[name] = value
+
+	return points
+
+
+# ----------------- Running the sweep ----------------------------------------------------------------------------
+
+def model_parameters(model, point):
+
+	# All the parameters for a model, with the defaults filled in for any not given in point.
+	if model not in MODELS:
+		raise ValueError(f"Unknown model {model}, should be one of {list(MODELS)}")
+	unknown = set(point) - set(MODELS[model])
+	if unknown:
+		raise ValueError(f"The {model} model does not have the parameters {sorted(unknown)}")
+
+	# NumPy numbers are turned into plain Python ones, so that they can be written to json
+	return {name: np.asarray(point.get(name, DEFAULTS[name])).item() for name in MODELS[model]}
+
+
+def build_population(model, parameters, seed=None):
+
+	# Makes the population for one run of a model.
+	return create_population(seed=seed, **parameters)
+
+
+def cache_key(model, parameters, T, repeats, seed):
+
+	# The name a point's results are stored under in the cache.
+	description = json.dumps({'model': model, 'parameters': parameters, 'T': T, 'repeats': repeats, 'seed': seed},
+								sort_keys=True)
+	return hashlib.sha256(description.encode()).hexdigest()
+
+
+def run_sweep(model, points, T, repeats=1, seed=0, cache='Data/SweepCache', workers=None):
+
+	# Runs each point repeats times for T time steps, and returns a list with the results of each point,
+	# of shape (repeats, T, len(STATUSES)). Every repeat of every missing point is run in parallel.
+	os.makedirs(cache, exist_ok=True)
+	seed = seeding.entropy(seed) # Without a seed a random one is picked, and recorded, rather than caching under None
+	parameters = [model_parameters(model, point) for point in points]
+	paths = [os.path.join(cache, cache_key(model, p, T, repeats, seed)) for p in parameters]
+
+	# Every point uses the same seeds for its repeats, the same as batch.run_repeats would
+	missing = [k for k, path in enumerate(paths) if not all(map(os.path.exists, file_names(path)[:2]))]
+	builds, seeds = [], []
+	for k in missing:
+		builds += [partial(build_population, model, parameters[k])]*repeats
+		seeds += seeding.spawn(seed, repeats)
+	jobs = (builds, [T]*len(builds), [Population.counts]*len(builds), seeds)
+
+	if workers == 1 or not builds:
+		results = list(map(batch.run_repeat, *jobs))
+	else:
+		with ProcessPoolExecutor(max_workers=workers) as pool:
+			results = list(pool.map(batch.run_repeat, *jobs))
+
+	for j, k in enumerate(missing):
+		save_trajectories(paths[k], results[j*repeats:(j + 1)*repeats], columns=list(STATUSES),
+							model=model, T=T, repeats=repeats, seed=seed, **parameters[k])
+
+	return [load_trajectories(path)[0] for path in paths]
@@ -0,0 +1,143 @@
+'''
+Saving and loading the data from repeated simulations.
+The counts from a set of repeats are stored as a binary .npy file, holding an integer array of shape
+(repeats, T, columns), along with a .json file of the same name recording the column names and
+the parameters the simulations were run with (beta, gamma, N, T, seed, etc.).
+The .npy file can be memory mapped, so a single repeat can be read without loading the whole file.
+
+For very long or very many runs the TrajectoryWriter class writes the data to disk as the simulations run,
+so the whole array never has to fit in memory. Alongside the data it keeps a small .progress.npy file,
+recording how many time steps of each repeat have been written, so the data can be read while the runs are going.
+batch.py also keeps a checkpoint of each repeat that is still running next to the data, so that stopped runs can be resumed.
+'''
+import json
+import os
+import numpy as np
+
+
+def file_names(path):
+
+	# The data, metadata and progress file names for a path, given with or without the .npy extension.
+	if path.endswith('.npy'):
+		path = path[:-len('.npy')]
+	return path + '.npy', path + '.json', path + '.progress.npy'
+
+
+def checkpoint_file(path, repeat):
+
+	# Where the checkpoint of a repeat that is still running is kept.
+	data_file, _, _ = file_names(path)
+	return data_file[:-len('.npy')] + f'.checkpoint{repeat}.npz'
+
+
+def write_metadata(metadata_file, columns, repeats, T, parameters):
+
+	metadata = {'columns': list(columns), 'repeats': repeats, 'T': T, 'parameters': parameters}
+	with open(metadata_file, 'w') as f:
+		json.dump(metadata, f, indent=4)
+
+
+def save_trajectories(path, data, columns, **parameters):
+
+	# Saves data of shape (repeats, T, columns), using the smallest integer type that fits the counts.
+	# Each file is written under another name first and then renamed, with the data last, so that if the data
+	# is there then so is the metadata, even if saving was stopped part way through.
+	data = np.asarray(data)
+	data_file, metadata_file, _ = file_names(path)
+
+	write_metadata(metadata_file + '.tmp', columns, data.shape[0], data.shape[1], parameters)
+	os.replace(metadata_file + '.tmp', metadata_file)
+
+	with open(data_file + '.tmp', 'wb') as f:
+		np.save(f, data.astype(np.min_scalar_type(max(int(data.max()), 0))))
+	os.replace(data_file + '.tmp', data_file)
+
+
+def load_trajectories(path, T=None, mmap=True):
+
+	# Loads data saved with save_trajectories or a TrajectoryWriter, returning the array and its metadata.
+	# For data from a TrajectoryWriter, metadata['progress'] gives the number of time steps written for each repeat.
+	# The older csv files, with all repeats one after the other, can also be loaded, but then T must be given.
+	if path.endswith('.csv'):
+		return load_csv_trajectories(path, T)
+
+	data_file, metadata_file, progress_file = file_names(path)
+	with open(metadata_file) as f:
+		metadata = json.load(f)
+
+	if os.path.exists(progress_file):
+		metadata['progress'] = np.load(progress_file).tolist()
+
+	data = np.load(data_file, mmap_mode='r' if mmap else None)
+
+	return data, metadata
+
+
+def resumable_metadata(path, repeats, T, columns, **parameters):
+
+	# The metadata of the runs already started at path, after checking they are the same as the runs about to be made,
+	# so that a resumed set of runs can't end up mixing different settings. Raises a ValueError saying what differs.
+	# The seed is left out, as it is read from the metadata when resuming.
+	_, metadata = load_trajectories(path)
+	expected = {'repeats': repeats, 'T': T, 'columns': list(columns)}
+	differences = [f"{name} was {metadata[name]} and is now {value}" for name, value in expected.items() if metadata[name] != value]
+
+	recorded = metadata['parameters']
+	differences += [f"{name} was {recorded.get(name)} and is now {value}" for name, value in parameters.items()
+					if name != 'seed' and recorded.get(name) != value]
+
+	if differences:
+		raise ValueError(f"Can't resume the runs in {path}, as " + ', '.join(differences) +
+							". Set RESUME to False to start them again, or use another path.")
+	return metadata
+
+
+def load_csv_trajectories(path, T):
+
+	# Loads a csv file written by the older repeated scripts, which have repeats*T rows.
+	with open(path) as f:
+		columns = f.readline().lstrip('#').strip().split(',')
+
+	data = np.loadtxt(path, delimiter=',', skiprows=1, ndmin=2)
+	data = data.astype(np.min_scalar_type(max(int(data.max()), 0))).reshape(-1, T, len(columns))
+
+	metadata = {'columns': columns, 'repeats': data.shape[0], 'T': T, 'parameters': {}}
+
+	return data, metadata
+
+
+class TrajectoryWriter:
+
+	'''
+	Streams the data from repeated simulations into a memory mapped .npy file.
+	The files are made once with TrajectoryWriter.create, after which any number of writers,
+	possibly in different processes, can open the same path and write their own repeats into it.
+	Each call to write stores a chunk of time steps and then updates the progress file.
+	'''
+
+	def __init__(self, path):
+		data_file, _, progress_file = file_names(path)
+		self.data = np.load(data_file, mmap_mode='r+')
+		self.progress = np.load(progress_file, mmap_mode='r+')
+
+	@classmethod
+	def create(cls, path, repeats, T, columns, dtype=np.int32, **parameters):
+
+	# Makes the (empty) files for repeats runs of T time steps, and returns a writer for them.
+		data_file, metadata_file, progress_file = file_names(path)
+
+		write_metadata(metadata_file, columns, repeats, T, parameters)
+		np.lib.format.open_memmap(data_file, mode='w+', dtype=dtype, shape=(repeats, T, len(columns))).flush()
+		np.save(progress_file, np.zeros(repeats, dtype=np.int64))
+
+		return cls(path)
+
+	def write(self, repeat, start, rows):
+
+	# Writes the rows for time steps start, start+1, ... of the given repeat.
+		stop = start + len(rows)
+		self.data[repeat, start:stop] = rows
+		self.data.flush()
+
+		self.progress[repeat] = stop
+		self.progress.flush()
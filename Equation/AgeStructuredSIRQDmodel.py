@@ -0,0 +1,52 @@
+import numpy as np
+import matplotlib.pyplot as plt
+import agestructured
+
+# --------------- Tunable parameters ----------------------
+groups = 10 # Number of age bands, each ten years wide
+N = 1000 # Population, split evenly between the age bands
+beta = 0.5 # Infection rate
+gamma = 0.04 # Recovery rate
+mu = np.linspace(0.005, 0.06, groups) # Death rate of each age band, rising with age
+kappa = 0.04 # Quarantine rate
+init_I = 3 # initial number of infectious people, spread evenly over the age bands
+mixing = 2.0 # How many age bands apart people still mix, the smaller the more they keep to their own age
+
+# The contact matrix, people mostly mix with those of a similar age
+ages = np.arange(groups)
+contact_matrix = np.exp(-abs(ages[:, None] - ages[None, :]) / mixing)
+contact_matrix *= groups / contact_matrix.sum(axis=1, keepdims=True) # The same number of contacts overall as everyone mixing
+
+# initial conditions, one row per age band in the order S, I, R, D, Q
+y0 = agestructured.initial_state(np.full(groups, N / groups), init_I / groups)
+t  = np.linspace(0, 150., 1000)         # time grid
+
+# solve the DEs, with the contact matrix, and with everyone mixing equally as a baseline
+soln = agestructured.solve(y0, t, beta, gamma, mu, kappa, contact_matrix)
+mixed = agestructured.solve(y0, t, beta, gamma, mu, kappa)
+total = soln.sum(axis=0)
+
+# plot results
+plt.rcParams['figure.figsize'] = 16, 8
+fig, (left, right) = plt.subplots(1, 2)
+labels = ['Susceptible', 'Infected', 'Recovered', 'Deceased', 'Quarantined']
+for j in range(5):
+    left.plot(t, total[:, j], color=f'C{j}', label=labels[j])
+    left.plot(t, mixed.sum(axis=0)[:, j], color=f'C{j}', linestyle='--')
+left.plot([], color='grey', linestyle='--', label='Everyone mixing')
+left.set_xlabel('Time')
+left.set_ylabel('Population')
+left.set_title(f'Age Structured SIRQD Model: gamma={gamma}, beta={beta}, kappa={kappa}')
+left.legend(loc=0)
+
+width = 0.4
+right.bar(ages - width/2, soln[:, -1, 3], width, label='Contact matrix')
+right.bar(ages + width/2, mixed[:, -1, 3], width, label='Everyone mixing')
+right.set_xticks(ages)
+right.set_xticklabels([f'{10*a}-{10*a + 9}' for a in ages])
+right.set_xlabel('Age')
+right.set_ylabel('Deaths')
+right.set_title('Deaths by age')
+right.legend(loc=0)
+
+plt.savefig(f'./Plots/AgeStructuredSIRQD_g={gamma}_b={beta}_k={kappa}.png')
@@ -0,0 +1,31 @@
+import numpy as np
+import matplotlib.pyplot as plt
+import models
+import ensemble
+
+# ------------ Tunable parameters --------------------
+N = 1000 # Totoal population
+betas = np.linspace(0.01, 0.6, 1000) # The infection rates to sweep over
+gamma = 0.04 # Recovery rate
+init_I = 3 # inital number of infectious people
+
+# initial conditions
+y0 = [N - init_I, init_I, 0]     # initial condition vector
+t  = np.linspace(0, 150., 1000)         # time grid
+
+# solve the DEs for every value of beta at once
+soln = ensemble.solve_ensemble(models.SIR, y0, t, {'beta': betas, 'gamma': gamma})
+peak = soln[:, :, 1].max(axis=1)
+final = soln[:, -1, 2]
+
+# plot results
+plt.rcParams['figure.figsize'] = 10, 8
+plt.figure()
+plt.plot(betas, peak, label='Peak number infected')
+plt.plot(betas, final, label='Recovered by end')
+plt.axvline(gamma, color='grey', linestyle='--', label='beta = gamma')
+plt.xlabel('Infection rate beta')
+plt.ylabel('Population')
+plt.title(f'SIR Model: sweep over beta, gamma={gamma}')
+plt.legend(loc=0)
+plt.savefig(f'./Plots/SIR_sweep_g={gamma}.png')
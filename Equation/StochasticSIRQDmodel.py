@@ -0,0 +1,58 @@
+import numpy as np
+import matplotlib.pyplot as plt
+from scipy.integrate import odeint
+import models
+import stochastic
+
+
+# --------------- Tunable parameters ----------------------
+N = 1000 # Population
+beta = 0.5 # Infection rate
+gamma = 0.04 # Recovery rate
+mu = 0.03 # Death rate
+kappa = 0.04 # Quarantine rate
+init_I = 3 # initial number of infectious people
+
+runs = 1000 # Number of stochastic simulations
+method = 'gillespie' # 'gillespie' for the exact simulation, 'tau_leap' for the faster approximation
+seed = None # Set to an integer to get the same simulations every time
+
+# The deterministic model, the same as in SIRQDmodel.py
+def f(y, t):
+    Si, Ii, Ri, Di, Qi = y
+
+    f0 = - ( beta * Si * Ii )/N
+    f1 = ( beta * Si * Ii )/N - (gamma * Ii) - (mu * Ii) - (kappa * Ii)
+    f2 = gamma * Ii + gamma * Qi
+    f3 = mu * Ii + mu * Qi
+    f4 = (kappa * Ii) - (mu * Qi) - (gamma * Qi)
+    return [f0, f1, f2, f3, f4]
+
+# initial conditions, in the order S, I, R, D, Q
+y0 = [N - init_I, init_I, 0, 0, 0]
+t  = np.linspace(0, 150., 1000)         # time grid
+
+# solve the DEs and run the stochastic simulations
+soln = odeint(f, y0, t)
+params = {'beta': beta, 'gamma': gamma, 'mu': mu, 'kappa': kappa}
+simulate = stochastic.gillespie if method == 'gillespie' else stochastic.tau_leap
+runs_soln = simulate(models.SIRQD, y0, t, params, runs=runs, seed=seed)
+
+# An outbreak dies out early if hardly anyone has been infected by the end
+extinct = runs_soln[:, -1, 0] > N - 10*init_I
+print(f'Probability of early extinction: {extinct.mean():.3f}')
+print(f'Final deaths: mean {runs_soln[:, -1, 3].mean():.1f}, standard deviation {runs_soln[:, -1, 3].std():.1f}')
+
+# plot results
+plt.rcParams['figure.figsize'] = 10, 8
+plt.figure()
+labels = ['Susceptible', 'Infected', 'Recovered', 'Deceased', 'Quarantined']
+colors = ['C0', 'C1', 'C2', 'C3', 'C4']
+for j in range(5):
+    plt.plot(t, runs_soln[:100, :, j].T, color=colors[j], alpha=0.05)
+    plt.plot(t, soln[:, j], color=colors[j], label=labels[j])
+plt.xlabel('Time')
+plt.ylabel('Population')
+plt.title(f'Stochastic SIRQD Model: gamma={gamma}, beta={beta}, mu={mu}, kappa={kappa}')
+plt.legend(loc=0)
+plt.savefig(f'./Plots/StochasticSIRQD_g={gamma}_b={beta}_m={mu}_k={kappa}.png')
@@ -0,0 +1,68 @@
+'''
+The SIRQD model for a population split into G groups, eg. age bands, each with its own rates,
+and a G by G contact matrix C saying how infectious each group is to each other group.
+The Susceptible people in group g are infected at rate
+
+    beta[g] * S[g] * sum over h of C[g, h] * I[h] / N
+
+where N is the whole population, so that with C all ones and the same rates in every group
+the groups add up to the single population of SIRQDmodel.py. This is the same as the contact matrix of the
+grouped agent populations in Agent/population.py, so the solutions can be compared with the agent runs.
+
+The sum over the groups is a single matrix-vector product, C @ I, and everything else is worked out
+for all the groups at once, so the right hand side costs about the same for hundreds of groups as for two.
+C can also be a scipy.sparse matrix, eg. for many groups that only mix with their neighbours.
+The compartments are in the same order as models.SIRQD, S, I, R, D, Q.
+'''
+import numpy as np
+from scipy.integrate import solve_ivp
+
+COMPARTMENTS = 'SIRDQ'
+
+
+def initial_state(sizes, init_I):
+
+    # The starting state of each group, shape (G, compartments), with sizes[g] people in group g,
+    # init_I of them infectious, given either for every group or as one number for each group.
+    sizes = np.asarray(sizes, dtype=float)
+    y0 = np.zeros((len(sizes), len(COMPARTMENTS)))
+    y0[:, 1] = init_I
+    y0[:, 0] = sizes - y0[:, 1]
+    return y0
+
+
+def rhs(y, beta, gamma, mu, kappa, contact_matrix=None):
+
+    # dy/dt for the state y of every group, shape (G, compartments). The rates are each a single value
+    # or one value per group. Without a contact matrix every group mixes with every other group equally.
+    S, I, R, D, Q = y.T
+    N = y.sum()
+
+    pressure = I.sum() if contact_matrix is None else contact_matrix @ I
+    infection = beta * S * pressure / N
+
+    dy = np.empty(y.shape)
+    dy[:, 0] = -infection
+    dy[:, 1] = infection - (gamma + mu + kappa) * I
+    dy[:, 2] = gamma * (I + Q)
+    dy[:, 3] = mu * (I + Q)
+    dy[:, 4] = kappa * I - (gamma + mu) * Q
+    return dy
+
+
+def solve(y0, t, beta, gamma, mu=0.0, kappa=0.0, contact_matrix=None, method='RK45', rtol=1e-6, atol=1e-6):
+
+    # Solves the equations for the starting state y0, shape (G, compartments), see initial_state.
+    # Returns the solution at the times in t, with shape (G, len(t), compartments), like ensemble.solve_ensemble.
+    t = np.asarray(t, dtype=float)
+    y0 = np.asarray(y0, dtype=float)
+    shape = y0.shape
+
+    def f(_, z):
+        return rhs(z.reshape(shape), beta, gamma, mu, kappa, contact_matrix).ravel()
+
+    soln = solve_ivp(f, (t[0], t[-1]), y0.ravel(), method=method, t_eval=t, rtol=rtol, atol=atol)
+    if not soln.success:
+        raise RuntimeError(soln.message)
+
+    return soln.y.reshape(shape + (len(t),)).transpose(0, 2, 1)
@@ -0,0 +1,40 @@
+'''
+Solves the differential equations of a model from models.py for a whole batch of parameters
+and initial conditions at once. The batch is stacked into one large system of equations, whose right hand side
+is worked out for every member of the batch in a single vectorised call, so solving thousands of
+parameter combinations costs about as much as solving a few of them one at a time with odeint.
+For the implicit solvers ('BDF' and 'Radau') the analytic Jacobian is used, which is block diagonal,
+one block per member of the batch, and so is passed to the solver as a sparse matrix.
+'''
+import numpy as np
+from scipy.integrate import solve_ivp
+from scipy.sparse import bsr_matrix
+
+
+def solve_ensemble(model, y0, t, params, method='RK45', rtol=1e-6, atol=1e-6):
+
+    # y0 can be a single initial condition, or one per member of the batch (shape (batch, compartments)),
+    # and each parameter either a single value or an array with one value per member of the batch.
+    # Returns the solutions at the times in t, with shape (batch, len(t), compartments).
+    t = np.asarray(t, dtype=float)
+    y0 = np.atleast_2d(np.asarray(y0, dtype=float))
+    batch = max([len(y0)] + [np.size(params[name]) for name in model.parameters])
+    compartments = len(model.compartments)
+
+    y0 = np.broadcast_to(y0, (batch, compartments))
+    p = {name: np.broadcast_to(np.asarray(params[name], dtype=float), (batch,)) for name in model.parameters}
+
+    def f(_, z):
+        return model.rhs(z.reshape(batch, compartments), p).ravel()
+
+    def jacobian(_, z):
+        blocks = model.jacobian(z.reshape(batch, compartments), p)
+        return bsr_matrix((blocks, np.arange(batch), np.arange(batch + 1)),
+                          shape=(batch*compartments, batch*compartments))
+
+    options = {'jac': jacobian} if method in ('BDF', 'Radau') else {}
+    soln = solve_ivp(f, (t[0], t[-1]), y0.ravel(), method=method, t_eval=t, rtol=rtol, atol=atol, **options)
+    if not soln.success:
+        raise RuntimeError(soln.message)
+
+    return soln.y.reshape(batch, compartments, len(t)).transpose(0, 2, 1)
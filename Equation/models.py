@@ -0,0 +1,129 @@
+'''
+The equation based models written as a set of reactions, each with a rate (propensity) and
+a change to the compartments (stoichiometry). For example in the SIR model infection happens at rate
+beta*S*I/N and moves one person from S to I, and recovery happens at rate gamma*I and moves one person from I to R.
+Written this way the same model can be simulated stochastically, see stochastic.py, and the right hand side
+of its differential equations, dy/dt = sum of rate times change over the reactions, along with its Jacobian,
+can be worked out for any model, see ensemble.py.
+The propensities work on whole arrays of states at once, with the compartments along the last axis,
+so that many simulations or solutions can be worked out together.
+'''
+import numpy as np
+
+
+class Model:
+
+    '''
+    A compartmental model. compartments is a string with one letter per compartment,
+    parameters the names of the rate parameters, stoichiometry an array with one row per reaction,
+    and propensities a function of the state y (shape (..., compartments)) and a dictionary of parameters,
+    returning the rate of each reaction (shape (..., reactions)).
+    propensity_jacobian gives the derivative of each rate with respect to each compartment,
+    with shape (..., reactions, compartments).
+    '''
+
+    def __init__(self, name, compartments, parameters, stoichiometry, propensities, propensity_jacobian):
+        self.name = name
+        self.compartments = compartments
+        self.parameters = parameters
+        self.stoichiometry = np.array(stoichiometry)
+        self.propensities = propensities
+        self.propensity_jacobian = propensity_jacobian
+
+    def rhs(self, y, p):
+
+        # dy/dt for the differential equations of the model
+        return self.propensities(y, p) @ self.stoichiometry
+
+    def jacobian(self, y, p):
+
+        # The derivative of dy/dt with respect to y, with shape (..., compartments, compartments)
+        return np.swapaxes(self.stoichiometry, 0, 1) @ self.propensity_jacobian(y, p)
+
+
+def SIR_propensities(y, p):
+    S, I = y[..., 0], y[..., 1]
+    N = y.sum(axis=-1)
+    return np.stack([p['beta'] * S * I / N,
+                     p['gamma'] * I], axis=-1)
+
+
+def SIRD_propensities(y, p):
+    S, I = y[..., 0], y[..., 1]
+    N = y.sum(axis=-1)
+    return np.stack([p['beta'] * S * I / N,
+                     p['gamma'] * I,
+                     p['mu'] * I], axis=-1)
+
+
+def SIRQD_propensities(y, p):
+    S, I, Q = y[..., 0], y[..., 1], y[..., 4]
+    N = y.sum(axis=-1)
+    return np.stack([p['beta'] * S * I / N,
+                     p['gamma'] * I,
+                     p['mu'] * I,
+                     p['kappa'] * I,
+                     p['gamma'] * Q,
+                     p['mu'] * Q], axis=-1)
+
+
+def infection_jacobian(y, p):
+
+    # The derivative of beta*S*I/N, where N is the sum of all compartments
+    S, I = y[..., 0], y[..., 1]
+    N = y.sum(axis=-1)
+    d = np.empty(y.shape)
+    d[...] = (-p['beta'] * S * I / N**2)[..., None]
+    d[..., 0] += p['beta'] * I / N
+    d[..., 1] += p['beta'] * S / N
+    return d
+
+
+def linear_jacobian(y, rate, compartment):
+
+    # The derivative of rate*y[compartment]
+    d = np.zeros(y.shape)
+    d[..., compartment] = rate
+    return d
+
+
+def SIR_propensity_jacobian(y, p):
+    return np.stack([infection_jacobian(y, p),
+                     linear_jacobian(y, p['gamma'], 1)], axis=-2)
+
+
+def SIRD_propensity_jacobian(y, p):
+    return np.stack([infection_jacobian(y, p),
+                     linear_jacobian(y, p['gamma'], 1),
+                     linear_jacobian(y, p['mu'], 1)], axis=-2)
+
+
+def SIRQD_propensity_jacobian(y, p):
+    return np.stack([infection_jacobian(y, p),
+                     linear_jacobian(y, p['gamma'], 1),
+                     linear_jacobian(y, p['mu'], 1),
+                     linear_jacobian(y, p['kappa'], 1),
+                     linear_jacobian(y, p['gamma'], 4),
+                     linear_jacobian(y, p['mu'], 4)], axis=-2)
+
+
+# The same models as in SIRmodel.py, SIRDmodel.py and SIRQDmodel.py
+SIR = Model('SIR', 'SIR', ('beta', 'gamma'),
+            [[-1, 1, 0],     # infection
+             [0, -1, 1]],    # recovery
+            SIR_propensities, SIR_propensity_jacobian)
+
+SIRD = Model('SIRD', 'SIRD', ('beta', 'gamma', 'mu'),
+             [[-1, 1, 0, 0],    # infection
+              [0, -1, 1, 0],    # recovery
+              [0, -1, 0, 1]],   # death
+             SIRD_propensities, SIRD_propensity_jacobian)
+
+SIRQD = Model('SIRQD', 'SIRDQ', ('beta', 'gamma', 'mu', 'kappa'),
+              [[-1, 1, 0, 0, 0],    # infection
+               [0, -1, 1, 0, 0],    # recovery
+               [0, -1, 0, 1, 0],    # death
+               [0, -1, 0, 0, 1],    # quarantine
+               [0, 0, 1, 0, -1],    # recovery in quarantine
+               [0, 0, 0, 1, -1]],   # death in quarantine
+              SIRQD_propensities, SIRQD_propensity_jacobian)
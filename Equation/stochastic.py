@@ -0,0 +1,84 @@
+'''
+Stochastic simulation of the equation based models defined in models.py.
+gillespie runs the exact stochastic simulation algorithm, where reactions happen one at a time after
+exponentially distributed waiting times. tau_leap is an approximation for large populations, where
+the number of times each reaction happens over a short time step tau is drawn from a Poisson distribution.
+Both run a whole ensemble of simulations at once, and return the state of each at the times in t,
+as an array of shape (runs, len(t), compartments).
+The parameters can be single values, or arrays with one value per run.
+'''
+import numpy as np
+
+
+def run_parameters(model, params, runs):
+
+    # One value of each parameter per run.
+    return {name: np.broadcast_to(np.asarray(params[name], dtype=float), (runs,)) for name in model.parameters}
+
+
+def gillespie(model, y0, t, params, runs=1, seed=None):
+    rng = np.random.default_rng(seed)
+    t = np.asarray(t, dtype=float)
+    params = run_parameters(model, params, runs)
+
+    y = np.tile(np.asarray(y0, dtype=np.int64), (runs, 1))
+    now = np.full(runs, t[0])
+    recorded = np.zeros(runs, dtype=np.int64)  # the number of times in t recorded so far, for each run
+    out = np.zeros((runs, len(t), y.shape[1]), dtype=np.int64)
+
+    active = np.arange(runs)
+    while active.size:
+        rates = model.propensities(y[active], {name: value[active] for name, value in params.items()})
+        total = rates.sum(axis=1)
+
+        # The time of the next reaction, never if nothing can happen any more
+        wait = np.full(len(active), np.inf)
+        possible = total > 0
+        wait[possible] = rng.exponential(1.0, np.count_nonzero(possible)) / total[possible]
+        next_time = now[active] + wait
+
+        # The state stays the same for all the times in t before the next reaction
+        stop = np.searchsorted(t, next_time, side='left')
+        counts = stop - recorded[active]
+        rows = np.repeat(active, counts)
+        cols = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts) + np.repeat(recorded[active], counts)
+        out[rows, cols] = np.repeat(y[active], counts, axis=0)
+        recorded[active] = stop
+
+        # Fire one reaction in each run that is not finished, chosen in proportion to the rates
+        going = stop < len(t)
+        active, rates, total, next_time = active[going], rates[going], total[going], next_time[going]
+        choice = (np.cumsum(rates, axis=1) < rng.random(len(active))[:, None] * total[:, None]).sum(axis=1)
+        y[active] += model.stoichiometry[np.minimum(choice, rates.shape[1] - 1)]
+        now[active] = next_time
+
+    return out
+
+
+def tau_leap(model, y0, t, params, runs=1, tau=None, seed=None):
+    rng = np.random.default_rng(seed)
+    t = np.asarray(t, dtype=float)
+    params = run_parameters(model, params, runs)
+    if tau is None:
+        tau = np.min(np.diff(t))
+
+    # Each reaction uses up one person from a single compartment
+    source = np.argmin(model.stoichiometry, axis=1)
+
+    y = np.tile(np.asarray(y0, dtype=np.int64), (runs, 1))
+    out = np.zeros((runs, len(t), y.shape[1]), dtype=np.int64)
+    out[:, 0] = y
+
+    for k in range(1, len(t)):
+        steps = int(np.ceil((t[k] - t[k-1]) / tau - 1e-9))
+        h = (t[k] - t[k-1]) / steps
+        for _ in range(steps):
+            fired = rng.poisson(model.propensities(y, params) * h)
+
+            # Reactions can't use up more people than there are, so numbers never go negative
+            for r, row in enumerate(model.stoichiometry):
+                n = np.minimum(fired[:, r], y[:, source[r]])
+                y += n[:, None] * row
+        out[:, k] = y
+
+    return out